@@ -0,0 +1,193 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.cache import increment_counter
+from api.revocation import revoked_tokens
+from users.models import UserRoles, UserRolesMixin
+
+VERSION_CLAIM = 'ver'
+# Под этим именем счётчики кэша проверенных JWT видны в cache_stats.
+STATS_NAME = 'jwt'
+# Раз в столько обращений счётчики процесса переносятся в общий кэш.
+STATS_FLUSH_EVERY = 100
+
+
+def get_token_claims(user):
+    """Claims, по которым права проверяются без запроса к базе."""
+    return {
+        'role': user.role,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        VERSION_CLAIM: user.token_version,
+    }
+
+
+def get_access_token(user):
+    refresh = RefreshToken.for_user(user)
+    for claim, value in get_token_claims(user).items():
+        refresh[claim] = value
+    access = refresh.access_token
+    # Время выдачи с долями секунды: по нему отзываются токены,
+    # выданные раньше отзыва, см. api.revocation.
+    access['iat'] = time.time()
+    return access
+
+
+class VerifiedTokenCache:
+    """
+    LRU-кэш проверенных токенов в памяти процесса. Ключ - хэш строки
+    токена, значение - уже проверенный токен, который хранится до
+    истечения его срока. Размер задаётся настройкой JWT_CACHE_SIZE,
+    0 отключает кэш.
+
+    Попадания и промахи считаются в процессе и раз в STATS_FLUSH_EVERY
+    обращений добавляются к общим счётчикам, которые показывает
+    manage.py cache_stats jwt.
+    """
+
+    def __init__(self):
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self._unflushed = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def get_key(raw_token):
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode()
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token):
+        key = self.get_key(raw_token)
+        with self._lock:
+            token = self._tokens.get(key)
+            if token is not None and token['exp'] > time.time():
+                self._tokens.move_to_end(key)
+                self.hits += 1
+                self._unflushed['hits'] += 1
+            else:
+                self._tokens.pop(key, None)
+                token = None
+                self.misses += 1
+                self._unflushed['misses'] += 1
+            flush = sum(self._unflushed.values()) >= STATS_FLUSH_EVERY
+        if flush:
+            self.flush_stats()
+        return token
+
+    def flush_stats(self):
+        """Переносит накопленные в процессе счётчики в общий кэш."""
+        with self._lock:
+            unflushed = self._unflushed
+            self._unflushed = {'hits': 0, 'misses': 0}
+        for counter, delta in unflushed.items():
+            if delta:
+                increment_counter(STATS_NAME, counter, delta)
+
+    def set(self, raw_token, token):
+        size = settings.JWT_CACHE_SIZE
+        if size <= 0:
+            return
+        key = self.get_key(raw_token)
+        with self._lock:
+            self._tokens[key] = token
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > size:
+                self._tokens.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+            self.hits = self.misses = 0
+            self._unflushed = {'hits': 0, 'misses': 0}
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._tokens),
+        }
+
+
+verified_tokens = VerifiedTokenCache()
+
+
+class ClaimsUser(UserRolesMixin, TokenUser):
+    """Пользователь, восстановленный из claims токена без запроса к базе."""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', UserRoles.USER)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация, которая для безопасных запросов к представлениям
+    с authenticate_from_claims = True собирает пользователя из claims
+    токена. Отозванные токены (api.revocation) отклоняются по списку
+    в памяти процесса; смена роли или удаление пользователя отзывает все
+    выданные ему токены. Когда пользователь всё же загружается из базы,
+    версия токена дополнительно сверяется с его token_version. Токены
+    без claims по-прежнему загружают пользователя из базы.
+
+    Проверка подписи и разбор токена кэшируются в verified_tokens.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = verified_tokens.get(raw_token)
+        if token is None:
+            token = super().get_validated_token(raw_token)
+            verified_tokens.set(raw_token, token)
+        return token
+
+    def get_token_user_id(self, request):
+        """
+        id пользователя из проверенного токена запроса без обращения
+        к базе; None для запросов без токена или с негодным токеном.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        try:
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+            token = self.get_validated_token(raw_token)
+        except AuthenticationFailed:
+            return None
+        return token.get(api_settings.USER_ID_CLAIM)
+
+    def authenticate(self, request):
+        view = request.parser_context.get('view')
+        self.use_claims = (
+            request.method in SAFE_METHODS
+            and getattr(view, 'authenticate_from_claims', False)
+        )
+        return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if revoked_tokens.is_revoked(validated_token):
+            raise AuthenticationFailed(
+                'Токен отозван.', code='token_revoked'
+            )
+        if VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        if self.use_claims:
+            return ClaimsUser(validated_token)
+        user = super().get_user(validated_token)
+        if user.token_version != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(
+                'Токен отозван.', code='token_revoked'
+            )
+        return user
@@ -0,0 +1,159 @@
+"""
+Общие части массовых операций: разбор пачки, построчная проверка
+сериализатором, проверка уникальности несколькими запросами на всю пачку
+и ответ с результатом по каждой строке.
+"""
+from collections import Counter
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+CHUNK_SIZE = 500
+
+CREATED = 'created'
+UPDATED = 'updated'
+ERROR = 'error'
+
+
+def get_items(data):
+    if not isinstance(data, list):
+        raise ValidationError(
+            {'detail': 'Ожидается JSON-массив или NDJSON.'}
+        )
+    if not data:
+        raise ValidationError({'detail': 'Пустой запрос.'})
+    if len(data) > settings.BULK_MAX_ITEMS:
+        raise ValidationError({
+            'detail': f'Не больше {settings.BULK_MAX_ITEMS} объектов '
+                      f'за запрос.'
+        })
+    return data
+
+
+def validate_items(serializer, items, results):
+    """
+    Проверяет каждую строку сериализатором. Ошибки записываются
+    в results, возвращаются пары (номер строки, validated_data)
+    прошедших проверку строк.
+    """
+    rows = []
+    for index, item in enumerate(items):
+        try:
+            rows.append((index, serializer.run_validation(item)))
+        except ValidationError as error:
+            results[index] = {'status': ERROR, 'errors': error.detail}
+    return rows
+
+
+def get_unique_message(model, field_name):
+    """Сообщение о занятом значении, как у UniqueValidator в DRF."""
+    field = model._meta.get_field(field_name)
+    return field.error_messages['unique'] % {
+        'model_name': model._meta.verbose_name,
+        'field_label': field.verbose_name,
+    }
+
+
+def find_existing(queryset, field_name, values):
+    """Значения поля, уже занятые в базе; запрос на каждые CHUNK_SIZE."""
+    values = list(values)
+    existing = set()
+    for start in range(0, len(values), CHUNK_SIZE):
+        existing.update(queryset.filter(**{
+            f'{field_name}__in': values[start:start + CHUNK_SIZE]
+        }).values_list(field_name, flat=True))
+    return existing
+
+
+def check_unique(queryset, field_names, rows, results):
+    """
+    Отсеивает строки, повторяющие уникальное значение внутри пачки или
+    уже занятое в базе: по запросу на поле вместо запроса на строку.
+    """
+    errors = {}
+    for field_name in field_names:
+        values = [data[field_name] for _, data in rows if field_name in data]
+        counts = Counter(values)
+        taken = find_existing(queryset, field_name, counts)
+        message = get_unique_message(queryset.model, field_name)
+        for index, data in rows:
+            value = data.get(field_name)
+            if value is None:
+                continue
+            if counts[value] > 1:
+                errors.setdefault(index, {})[field_name] = [
+                    'Значение повторяется в запросе.'
+                ]
+            elif value in taken:
+                errors.setdefault(index, {})[field_name] = [message]
+    for index, error in errors.items():
+        results[index] = {'status': ERROR, 'errors': error}
+    return [(index, data) for index, data in rows if index not in errors]
+
+
+def resolve_slugs(queryset, field_name, rows, results):
+    """
+    Заменяет slug'и в поле field_name (один slug или список) объектами:
+    один запрос на каждые CHUNK_SIZE slug'ов всей пачки. Строки со
+    ссылками на несуществующие объекты отсеиваются.
+    """
+    slugs = set()
+    for _, data in rows:
+        value = data.get(field_name)
+        if value is not None:
+            slugs.update(value if isinstance(value, list) else [value])
+    slugs = list(slugs)
+    objects = {}
+    for start in range(0, len(slugs), CHUNK_SIZE):
+        objects.update(
+            (obj.slug, obj) for obj in queryset.filter(
+                slug__in=slugs[start:start + CHUNK_SIZE]
+            )
+        )
+    valid = []
+    for index, data in rows:
+        value = data.get(field_name)
+        if value is not None:
+            values = value if isinstance(value, list) else [value]
+            missing = [slug for slug in values if slug not in objects]
+            if missing:
+                results[index] = {'status': ERROR, 'errors': {field_name: [
+                    f'Объекты со slug {", ".join(missing)} не существуют.'
+                ]}}
+                continue
+            data[field_name] = (
+                [objects[slug] for slug in dict.fromkeys(value)]
+                if isinstance(value, list) else objects[value]
+            )
+        valid.append((index, data))
+    return valid
+
+
+def get_bulk_response(results):
+    """
+    Результаты по строкам в порядке запроса. 201 (или 200 при одних
+    обновлениях) - все строки сохранены, 400 - ни одна, 207 - часть.
+    """
+    results = [
+        {'row': index, **results[index]} for index in sorted(results)
+    ]
+    counts = Counter(result['status'] for result in results)
+    if not counts[ERROR]:
+        code = (
+            status.HTTP_201_CREATED if counts[CREATED] else status.HTTP_200_OK
+        )
+    elif counts[ERROR] == len(results):
+        code = status.HTTP_400_BAD_REQUEST
+    else:
+        code = status.HTTP_207_MULTI_STATUS
+    return Response(
+        {
+            CREATED: counts[CREATED],
+            UPDATED: counts[UPDATED],
+            'errors': counts[ERROR],
+            'results': results,
+        },
+        status=code
+    )
@@ -0,0 +1,184 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.http import quote_etag
+
+VERSION_KEY = 'versions:{label}'
+RESPONSE_KEY = 'response:{name}:{digest}'
+STATS_KEY = 'response-stats:{name}:{counter}'
+
+_deferred = threading.local()
+_pending = threading.local()
+
+
+def get_state_cache():
+    """Кэш версий и счётчиков, которые не вытесняются вместе с ответами."""
+    return caches[settings.STATE_CACHE]
+
+
+def get_version_key(model):
+    return VERSION_KEY.format(label=model._meta.label_lower)
+
+
+def get_versions(*models):
+    """
+    Возвращает текущие версии моделей. Версия - время последнего изменения
+    модели в наносекундах, поэтому по ней же вычисляется Last-Modified.
+    Отсутствующая в кэше версия заводится от текущего времени.
+    """
+    state = get_state_cache()
+    keys = [get_version_key(model) for model in models]
+    versions = state.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            state.add(key, time.time_ns(), timeout=None)
+        versions.update(state.get_many(missing))
+    return tuple(versions.get(key, 0) for key in keys)
+
+
+class PendingBumps:
+    """Модели, версии которых меняются после фиксации транзакции."""
+
+    def __init__(self):
+        self.models = set()
+
+    def is_scheduled(self):
+        """Не отброшен ли вызов откатом транзакции или точки сохранения."""
+        return any(
+            entry[1] is self
+            for entry in transaction.get_connection().run_on_commit
+        )
+
+    def __call__(self):
+        if getattr(_pending, 'bumps', None) is self:
+            _pending.bumps = None
+        for model in self.models:
+            set_next_version(model)
+
+
+def bump_version(model):
+    """
+    Меняет версию модели, сбрасывая зависящие от неё ответы. Внутри
+    транзакции версия меняется один раз после её фиксации: иначе другой
+    процесс успел бы прочитать ещё старые строки и закэшировать ответ
+    под новой версией.
+    """
+    deferred = getattr(_deferred, 'models', None)
+    if deferred is not None:
+        deferred.add(model)
+        return
+    if not transaction.get_connection().in_atomic_block:
+        set_next_version(model)
+        return
+    pending = getattr(_pending, 'bumps', None)
+    if pending is None or not pending.is_scheduled():
+        pending = _pending.bumps = PendingBumps()
+        transaction.on_commit(pending)
+    pending.models.add(model)
+
+
+def set_next_version(model):
+    """
+    Новая версия всегда попадает в следующую целую секунду: Last-Modified
+    считается в секундах, и запись в ту же секунду, что и отданный ответ,
+    иначе не изменила бы его, а If-Modified-Since получил бы устаревший
+    304.
+    """
+    state = get_state_cache()
+    key = get_version_key(model)
+    next_second = ((state.get(key) or 0) // 10 ** 9 + 1) * 10 ** 9
+    state.set(key, max(time.time_ns(), next_second), timeout=None)
+
+
+@contextmanager
+def defer_version_bumps():
+    """
+    Собирает вызовы bump_version внутри блока и меняет версию каждой
+    затронутой модели один раз при выходе: массовая запись из сотен
+    строк сбрасывает кэш ответов однажды, а не на каждой строке.
+    Вложенный блок работает как часть внешнего.
+    """
+    if getattr(_deferred, 'models', None) is not None:
+        yield
+        return
+    _deferred.models = set()
+    try:
+        yield
+    finally:
+        models, _deferred.models = _deferred.models, None
+        for model in models:
+            bump_version(model)
+
+
+def normalize_query(query_params):
+    """Строка запроса с упорядоченными параметрами и их значениями."""
+    return urlencode(sorted(
+        (key, value)
+        for key, values in query_params.lists()
+        for value in values
+    ))
+
+
+def get_request_digest(request, versions, *parts):
+    """Хэш запроса: хост, нормализованная строка запроса и версии моделей."""
+    source = '|'.join((
+        request.get_host(),
+        normalize_query(request.query_params),
+        ':'.join(str(version) for version in versions),
+        *parts
+    ))
+    return hashlib.md5(source.encode()).hexdigest()
+
+
+def get_response_cache_key(name, request, models):
+    return RESPONSE_KEY.format(
+        name=name,
+        digest=get_request_digest(request, get_versions(*models))
+    )
+
+
+def get_conditional_markers(request, models, *parts):
+    """
+    ETag и время последнего изменения ответа, вычисленные только по
+    версиям моделей, без выполнения запроса к базе и сериализации.
+    """
+    versions = get_versions(*models)
+    etag = quote_etag(get_request_digest(request, versions, *parts))
+    return etag, max(versions) // 10 ** 9
+
+
+def get_cached_response_data(name, key):
+    data = cache.get(key)
+    increment_counter(name, 'misses' if data is None else 'hits')
+    return data
+
+
+def set_cached_response_data(key, data):
+    cache.set(key, data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def increment_counter(name, counter, delta=1):
+    state = get_state_cache()
+    key = STATS_KEY.format(name=name, counter=counter)
+    if not state.add(key, delta, timeout=None):
+        try:
+            state.incr(key, delta)
+        except ValueError:
+            state.set(key, delta, timeout=None)
+
+
+def get_stats(name):
+    """Счётчики попаданий и промахов кэша ответов или проверенных JWT."""
+    keys = {
+        counter: STATS_KEY.format(name=name, counter=counter)
+        for counter in ('hits', 'misses')
+    }
+    values = get_state_cache().get_many(keys.values())
+    return {counter: values.get(key, 0) for counter, key in keys.items()}
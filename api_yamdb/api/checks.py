@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core import checks
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register(checks.Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Версии моделей в кэше сбрасывают ответы и ETag во всех процессах:
+    с кэшем в памяти процесса запись в одном процессе не видна другим.
+    """
+    errors = []
+    for alias in ('default', settings.STATE_CACHE):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND')
+        if backend is None:
+            errors.append(checks.Error(
+                f'В CACHES нет кэша {alias}.',
+                id='api.E001',
+            ))
+        elif backend in PROCESS_LOCAL_CACHES:
+            errors.append(checks.Error(
+                f'Кэш {alias} ({backend}) не общий для процессов: '
+                f'остальные процессы будут отдавать устаревшие ответы и 304.',
+                hint='Укажите в CACHES общий бэкенд: файловый, Memcached '
+                     'или DatabaseCache.',
+                id='api.E001',
+            ))
+    return errors
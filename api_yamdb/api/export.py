@@ -0,0 +1,87 @@
+import csv
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
+
+from api.permissions import IsAdmin
+
+CHUNK_SIZE = 500
+
+
+class Echo:
+    """Буфер для csv.writer, который просто возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def iter_chunks(rows, size=CHUNK_SIZE):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stream_ndjson(fields, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in iter_chunks(rows):
+        yield ''.join(
+            encoder.encode(dict(zip(fields, row))) + '\n' for row in chunk
+        )
+
+
+def stream_csv(fields, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for chunk in iter_chunks(rows):
+        yield ''.join(writer.writerow(row) for row in chunk)
+
+
+OUTPUT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson', stream_ndjson),
+    'csv': ('text/csv; charset=utf-8', 'csv', stream_csv),
+}
+
+
+class BaseExportView(APIView):
+    """
+    Потоковая выгрузка всех объектов модели в NDJSON или CSV (параметр
+    output). Строки выбираются итератором по CHUNK_SIZE и сразу уходят
+    клиенту, поэтому память на запрос не зависит от объёма выгрузки.
+    """
+    permission_classes = (IsAdmin,)
+    filterset_class = None
+    # Пары «имя в выгрузке - поле для values_list».
+    export_fields = ()
+    filename = None
+
+    def get(self, request):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in OUTPUT_FORMATS:
+            raise ValidationError({'output': [
+                f'Доступные форматы: {", ".join(OUTPUT_FORMATS)}.'
+            ]})
+        filterset = self.filterset_class(
+            request.query_params,
+            queryset=self.filterset_class._meta.model.objects.all(),
+            request=request
+        )
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+        names, lookups = zip(*self.export_fields)
+        rows = filterset.qs.order_by('pk').values_list(*lookups).iterator(
+            chunk_size=CHUNK_SIZE
+        )
+        content_type, extension, stream = OUTPUT_FORMATS[output]
+        response = StreamingHttpResponse(
+            stream(names, rows), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{self.filename}.{extension}"'
+        )
+        return response
@@ -1,12 +1,115 @@
-from django_filters.rest_framework import FilterSet, CharFilter
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django_filters.rest_framework import (
+    CharFilter,
+    FilterSet,
+    IsoDateTimeFromToRangeFilter,
+    NumberFilter,
+)
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+from rest_framework.settings import api_settings
 
-from reviews.models import Title
+from reviews.fts import FTS_TABLE, fts_enabled
+from reviews.models import Comment, Review, Title
+from reviews.search import build_match_query, normalize_name, tokenize
+
+
+def prefix_lookup(field_name, value):
+    """
+    Условие «нормализованное значение начинается с value» в виде
+    диапазона [value, value с увеличенным последним символом), который
+    в отличие от LIKE выполняется поиском по индексу.
+    """
+    prefix = normalize_name(value)
+    upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return Q(**{
+        f'{field_name}__gte': prefix, f'{field_name}__lt': upper_bound
+    })
 
 
 class TitleFilter(FilterSet):
+    name = CharFilter(method='filter_name')
     category = CharFilter(field_name='category__slug')
     genre = CharFilter(field_name='genre__slug')
 
     class Meta:
         model = Title
         fields = ('name', 'year', 'category', 'genre')
+
+    def filter_name(self, queryset, name, value):
+        if not normalize_name(value):
+            return queryset
+        return queryset.filter(prefix_lookup('name_normalized', value))
+
+
+class ReviewExportFilter(FilterSet):
+    """
+    Фильтры выгрузки отзывов: произведение, автор и диапазон дат
+    (pub_date_after и pub_date_before).
+    """
+    title = NumberFilter(field_name='title_id')
+    author = CharFilter(field_name='author__username')
+    pub_date = IsoDateTimeFromToRangeFilter()
+
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'pub_date')
+
+
+class CommentExportFilter(ReviewExportFilter):
+    title = NumberFilter(field_name='review__title_id')
+    review = NumberFilter(field_name='review_id')
+
+    class Meta:
+        model = Comment
+        fields = ('title', 'review', 'author', 'pub_date')
+
+
+class NormalizedSearchFilter(BaseFilterBackend):
+    """
+    Поиск без учёта регистра, в том числе для кириллицы, по префиксу
+    нормализованных теневых колонок из search_fields представления.
+    """
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.search_param, '')
+        if not normalize_name(value):
+            return queryset
+        condition = Q()
+        for field_name in getattr(view, 'search_fields', ()):
+            condition |= prefix_lookup(field_name, value)
+        return queryset.filter(condition)
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """
+    Полнотекстовый поиск по названию и описанию произведения.
+    На SQLite с FTS5 результаты упорядочены по релевансу (bm25), если
+    порядок не задан явно параметром ordering. Без FTS5 поиск идёт по
+    вхождению основ слов в search_document, без ранжирования.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not tokenize(query):
+            return queryset
+        if not fts_enabled(queryset.db):
+            for token in tokenize(query):
+                queryset = queryset.filter(search_document__contains=token)
+            return queryset
+
+        match = build_match_query(query)
+        table = queryset.model._meta.db_table
+        queryset = queryset.filter(pk__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        ))
+        if OrderingFilter.ordering_param in request.query_params:
+            return queryset
+        return queryset.annotate(search_rank=RawSQL(
+            f'SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id',
+            (match,)
+        )).order_by('search_rank', *queryset.query.order_by)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import get_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Show hit/miss counters of the API response cache and of the '
+        'verified JWT cache (jwt)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*', default=['titles', 'jwt'],
+            help='Cached endpoint basenames or jwt'
+        )
+
+    def handle(self, *args, **kwargs):
+        for name in kwargs['names']:
+            stats = get_stats(name)
+            total = stats['hits'] + stats['misses']
+            ratio = stats['hits'] / total if total else 0
+            self.stdout.write(
+                f'{name}: hits={stats["hits"]} misses={stats["misses"]} '
+                f'hit_ratio={ratio:.2%}'
+            )
@@ -0,0 +1,194 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class DepthLimitedPageNumberPagination(PageNumberPagination):
+    """
+    Постраничная пагинация, которая не отдаёт страницы глубже
+    settings.PAGINATION_MAX_PAGE_DEPTH: их OFFSET слишком дорог.
+    """
+    depth_error_message = (
+        'Страница {page_number} недоступна, максимальная глубина '
+        'постраничной выдачи - {max_depth}.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.check_page_depth(request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def check_page_depth(self, request):
+        page_number = request.query_params.get(self.page_query_param)
+        max_depth = settings.PAGINATION_MAX_PAGE_DEPTH
+        if not page_number or not page_number.isdigit() or not max_depth:
+            return
+        if int(page_number) > max_depth:
+            raise NotFound(self.get_depth_error_message(
+                page_number, max_depth
+            ))
+
+    def get_depth_error_message(self, page_number, max_depth):
+        return self.depth_error_message.format(
+            page_number=page_number, max_depth=max_depth
+        )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по ключу: следующая страница выбирается условием на значения
+    полей сортировки последней записи, а не через OFFSET, и без COUNT.
+    Последним полем в ordering должен быть уникальный ключ.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def __init__(self, ordering, page_size=None):
+        self.ordering = tuple(ordering)
+        self.page_size = page_size or api_settings.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.fields = [
+            queryset.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+        position, reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self.invert(name) for name in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(ordering, position)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.next_position = self.previous_position = None
+        if results and (has_more if not reverse else position is not None):
+            self.next_position = self.get_position(results[-1])
+        if results and (has_more if reverse else position is not None):
+            self.previous_position = self.get_position(results[0])
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_link(self.next_position, reverse=False)),
+            ('previous', self.get_link(self.previous_position, reverse=True)),
+            ('results', data),
+        ]))
+
+    @staticmethod
+    def invert(name):
+        return name[1:] if name.startswith('-') else f'-{name}'
+
+    def get_keyset_filter(self, ordering, position):
+        """
+        Для сортировки (a, b, c) строит условие
+        a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z).
+        """
+        keyset_filter = Q()
+        equal = Q()
+        for name, value in zip(ordering, position):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            field_name = name.lstrip('-')
+            keyset_filter |= equal & Q(**{f'{field_name}__{lookup}': value})
+            equal &= Q(**{field_name: value})
+        return keyset_filter
+
+    def get_position(self, obj):
+        return [field.value_to_string(obj) for field in self.fields]
+
+    def get_link(self, position, reverse):
+        if position is None:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(position, reverse)
+        )
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': reverse})
+        return urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode()))
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, payload['p'])
+            ]
+            reverse = bool(payload['r'])
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(position) != len(self.fields) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+
+class KeysetOrPageNumberPagination(DepthLimitedPageNumberPagination):
+    """
+    Постраничная пагинация с переключением на пагинацию по ключу
+    параметром ?pagination=cursor. В режиме курсора порядок выдачи
+    всегда задаётся keyset_ordering, параметр ordering не учитывается.
+    """
+    keyset_ordering = None
+    mode_query_param = 'pagination'
+    keyset_mode = 'cursor'
+    depth_error_message = (
+        DepthLimitedPageNumberPagination.depth_error_message
+        + ' Для обхода всей выборки используйте ?pagination=cursor.'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset_paginator = None
+        if self.is_keyset_requested(request):
+            self.keyset_paginator = KeysetPagination(
+                self.keyset_ordering, self.page_size
+            )
+            return self.keyset_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset_paginator is not None:
+            return self.keyset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def is_keyset_requested(self, request):
+        return (
+            request.query_params.get(self.mode_query_param)
+            == self.keyset_mode
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+
+class TitlePagination(KeysetOrPageNumberPagination):
+    keyset_ordering = ('-year', 'name', 'id')
+
+
+class PubDatePagination(KeysetOrPageNumberPagination):
+    keyset_ordering = ('pub_date', 'id')
+
+
+class UserPagination(KeysetOrPageNumberPagination):
+    keyset_ordering = ('username', 'id')
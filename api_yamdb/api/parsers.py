@@ -0,0 +1,28 @@
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    NDJSON: по JSON-объекту на строку. Возвращает список объектов, как
+    JSONParser для массива; пустые строки пропускаются.
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        items = []
+        number = 0
+        try:
+            lines = codecs.getreader(encoding)(stream)
+            for number, line in enumerate(lines, start=1):
+                if line.strip():
+                    items.append(json.loads(line))
+        except ValueError as error:
+            raise ParseError(f'Строка {number}: некорректный JSON - {error}')
+        return items
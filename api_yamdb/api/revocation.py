@@ -0,0 +1,151 @@
+"""
+Список отозванных токенов. Отзыв записывается в таблицу TokenRevocation:
+отдельный токен по jti или все токены пользователя, выданные до момента
+отзыва. Каждый процесс держит действующие отзывы в памяти - множество jti
+и словарь «пользователь - время отзыва», - так что проверка токена не
+обращается ни к базе, ни к кэшу.
+
+Раз в TOKEN_REVOCATION_POLL_INTERVAL секунд процесс одним запросом
+читает из базы отметку таблицы - наибольший id и число записей - и при
+её смене перечитывает список. Процесс, отозвавший токены, перечитывает
+его сразу, остальные - не позже чем через интервал опроса.
+"""
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import TokenRevocation
+
+
+def get_issued_at(token):
+    """
+    Время выдачи токена. У токенов, выданных без claim iat, оно
+    вычисляется по сроку действия.
+    """
+    if 'iat' in token:
+        return token['iat']
+    return token['exp'] - api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+
+
+def save_revocation(**fields):
+    now = timezone.now()
+    with transaction.atomic():
+        TokenRevocation.objects.filter(expires_at__lte=now).delete()
+        TokenRevocation.objects.create(**fields)
+        transaction.on_commit(revoked_tokens.invalidate)
+
+
+def revoke_token(token):
+    """Отзывает один токен до истечения его срока."""
+    save_revocation(
+        user_id=token[api_settings.USER_ID_CLAIM],
+        jti=token[api_settings.JTI_CLAIM],
+        expires_at=datetime.fromtimestamp(token['exp'], tz=timezone.utc),
+    )
+
+
+def revoke_user_tokens(user_id):
+    """
+    Отзывает все токены пользователя, выданные до этого момента. Через
+    ACCESS_TOKEN_LIFETIME все они истекут, и запись станет не нужна.
+    """
+    now = timezone.now()
+    save_revocation(
+        user_id=user_id,
+        issued_before=now,
+        expires_at=now + api_settings.ACCESS_TOKEN_LIFETIME,
+    )
+
+
+class RevocationList:
+    """Действующие отзывы токенов в памяти процесса."""
+
+    def __init__(self):
+        self._jtis = frozenset()
+        self._issued_before = {}
+        self._watermark = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._jtis = frozenset()
+            self._issued_before = {}
+            self._watermark = self._checked_at = None
+
+    def invalidate(self):
+        """Сверяет отметку таблицы при следующей проверке токена."""
+        self._checked_at = None
+
+    def load(self):
+        jtis = set()
+        issued_before = {}
+        rows = TokenRevocation.objects.filter(
+            expires_at__gt=timezone.now()
+        ).values_list('user_id', 'jti', 'issued_before')
+        for user_id, jti, revoked_at in rows.iterator():
+            if jti:
+                jtis.add(jti)
+            else:
+                issued_before[user_id] = max(
+                    revoked_at.timestamp(),
+                    issued_before.get(user_id, 0)
+                )
+        self._jtis = frozenset(jtis)
+        self._issued_before = issued_before
+
+    @staticmethod
+    def get_watermark():
+        """
+        Отметка таблицы отзывов. Каждый отзыв добавляет запись с новым id,
+        а удаление записей меняет их число.
+        """
+        watermark = TokenRevocation.objects.aggregate(
+            last_id=Max('id'), count=Count('id')
+        )
+        return watermark['last_id'], watermark['count']
+
+    def is_fresh(self, now):
+        interval = settings.TOKEN_REVOCATION_POLL_INTERVAL
+        return (
+            self._checked_at is not None
+            and now - self._checked_at < interval
+        )
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.is_fresh(now):
+            return
+        with self._lock:
+            if self.is_fresh(now):
+                return
+            watermark = self.get_watermark()
+            if watermark != self._watermark:
+                self.load()
+                self._watermark = watermark
+            self._checked_at = now
+
+    def is_revoked(self, token):
+        self.refresh()
+        if token.get(api_settings.JTI_CLAIM) in self._jtis:
+            return True
+        revoked_at = self._issued_before.get(
+            token.get(api_settings.USER_ID_CLAIM)
+        )
+        return revoked_at is not None and get_issued_at(token) < revoked_at
+
+    def get_stats(self):
+        return {
+            'jtis': len(self._jtis),
+            'users': len(self._issued_before),
+            'watermark': self._watermark,
+        }
+
+
+revoked_tokens = RevocationList()
@@ -1,10 +1,12 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.relations import MANY_RELATION_KWARGS
 
+from api.authentication import get_access_token
 from api.utils import send_conform_mail
 from reviews.models import (
     Category,
@@ -13,6 +15,7 @@ from reviews.models import (
     Review,
     Title,
 )
+from users.bloom import user_index
 from users.constants import EMAIL_MAX_LENGTH, USERNAME_MAX_LENGTH
 from users.validators import validate_username
 
@@ -32,7 +35,18 @@ class SignupSerializer(serializers.Serializer):
     def validate(self, data):
         email = data.get('email')
         username = data.get('username')
+        # Если фильтр Блума не знает ни юзернейма, ни емейла, пользователя
+        # точно нет (или его только что создал другой процесс, см. create).
+        if (
+            not user_index.may_have_username(username)
+            and not user_index.may_have_email(email)
+        ):
+            data['user'] = None
+        else:
+            data['user'] = self.get_existing_user(email, username)
+        return data
 
+    def get_existing_user(self, email, username):
         user_by_email = User.objects.filter(email=email).first()
         user_by_username = User.objects.filter(username=username).first()
 
@@ -45,15 +59,23 @@ class SignupSerializer(serializers.Serializer):
                 errors['username'] = [
                     f'Юзернейм {username} занят другим пользователем.']
             raise ValidationError(errors)
+        return user_by_email
 
-        data['user'] = user_by_email
-        return data
-
+    @transaction.atomic
     def create(self, validated_data):
-        user = (validated_data.get('user')
-                or User.objects.create(
-                    email=validated_data.get('email'),
-                    username=validated_data.get('username')))
+        email = validated_data.get('email')
+        username = validated_data.get('username')
+        user = validated_data.get('user')
+        if user is None:
+            try:
+                with transaction.atomic():
+                    user = User.objects.create(
+                        email=email, username=username
+                    )
+            except IntegrityError:
+                user = self.get_existing_user(email, username)
+                if user is None:
+                    raise
         send_conform_mail(user)
         return user
 
@@ -67,6 +89,19 @@ class UsersSerializer(serializers.ModelSerializer):
             'username', 'email', 'first_name', 'last_name', 'bio', 'role')
 
 
+class UsersBulkSerializer(UsersSerializer):
+    """
+    Сериализатор строки массового создания пользователей. Уникальность
+    юзернейма и емейла проверяется сразу для всей пачки, поэтому
+    построчные UniqueValidator отключены.
+    """
+    class Meta(UsersSerializer.Meta):
+        extra_kwargs = {
+            'username': {'validators': [validate_username]},
+            'email': {'validators': []},
+        }
+
+
 class UsersForMeSerializer(UsersSerializer):
     """
     Сериализатор для модели пользователя, предназначенный для запросов,
@@ -92,9 +127,8 @@ class ObtainTokenSerializer(serializers.Serializer):
         return data
 
     def get_token_for_user(self, user):
-        refresh = RefreshToken.for_user(user)
         return {
-            'token': str(refresh.access_token),
+            'token': str(get_access_token(user)),
         }
 
 
@@ -114,33 +148,120 @@ class GenreSerializer(serializers.ModelSerializer):
         lookup_field = 'slug'
 
 
+class BulkSlugManyRelatedField(serializers.ManyRelatedField):
+    """
+    Список slug'ов, разрешаемый одним запросом slug__in вместо
+    отдельного запроса на каждый элемент.
+    """
+    default_error_messages = {
+        'does_not_exist': 'Объекты со slug {slugs} не существуют.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        if not all(isinstance(slug, str) for slug in data):
+            self.child_relation.fail('invalid')
+        slugs = list(dict.fromkeys(data))
+        slug_field = self.child_relation.slug_field
+        objects = {
+            getattr(obj, slug_field): obj
+            for obj in self.child_relation.get_queryset().filter(
+                **{f'{slug_field}__in': slugs}
+            )
+        }
+        missing = [slug for slug in slugs if slug not in objects]
+        if missing:
+            self.fail('does_not_exist', slugs=', '.join(missing))
+        return [objects[slug] for slug in slugs]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField, который при many=True разрешает slug'и пачкой."""
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkSlugManyRelatedField(**list_kwargs)
+
+
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор для Произведений как для чтения, так и для записи."""
     category = serializers.SlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = BulkSlugRelatedField(
         slug_field='slug',
         queryset=Genre.objects.all(),
         many=True,
         allow_empty=False,
         allow_null=False
     )
-    rating = serializers.IntegerField(read_only=True, default=0)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+        )
+
+    def create(self, validated_data):
+        genres = validated_data.pop('genre')
+        title = super().create(validated_data)
+        title.set_genres(genres)
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        instance = super().update(instance, validated_data)
+        if genres is not None:
+            instance.set_genres(genres)
+        return instance
 
     def to_representation(self, instance):
         response = super().to_representation(instance)
-        response['genre'] = GenreSerializer(
-            instance.genre.all(), many=True
-        ).data
-        response['category'] = CategorySerializer(instance.category).data
+        response['genre'] = [
+            self.get_nested_representation(GenreSerializer, genre)
+            for genre in instance.genre.all()
+        ]
+        response['category'] = self.get_nested_representation(
+            CategorySerializer, instance.category
+        )
         return response
 
+    def get_nested_representation(self, serializer_class, obj):
+        """
+        Представление жанра или категории строится один раз на страницу:
+        при выдаче списка дочерний сериализатор общий для всех объектов.
+        """
+        if not hasattr(self, '_nested_representations'):
+            self._nested_representations = {}
+        key = (serializer_class, getattr(obj, 'pk', None))
+        if key not in self._nested_representations:
+            self._nested_representations[key] = serializer_class(obj).data
+        return self._nested_representations[key]
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор элемента массовой записи произведений. Категория и
+    жанры принимаются как slug'и и разрешаются сразу для всей пачки
+    (api.bulk.resolve_slugs).
+    """
+    category = serializers.SlugField()
+    genre = serializers.ListField(
+        child=serializers.SlugField(), allow_empty=False
+    )
+
+    class Meta:
+        model = Title
+        fields = ('name', 'year', 'description', 'genre', 'category')
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Формирование информации об отзыве."""
@@ -151,10 +272,7 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     def get_title(self):
-        return get_object_or_404(
-            Title,
-            pk=self.context.get('view').kwargs.get('title_id')
-        )
+        return self.context['view'].get_title()
 
     def get_user(self):
         return self.context['request'].user
@@ -0,0 +1,35 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.cache import bump_version
+from api.revocation import revoke_user_tokens
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+
+User = get_user_model()
+
+VERSIONED_MODELS = (Category, Comment, Genre, GenreTitle, Review, Title, User)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def bump_model_version(sender, **kwargs):
+    if sender in VERSIONED_MODELS:
+        bump_version(sender)
+
+
+@receiver(m2m_changed, sender=GenreTitle)
+def bump_genre_title_version(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_version(GenreTitle)
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_user_tokens(sender, instance, created, **kwargs):
+    if not created and instance.claims_changed():
+        revoke_user_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_tokens(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
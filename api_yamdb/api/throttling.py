@@ -0,0 +1,181 @@
+"""
+Ограничение частоты запросов алгоритмом token bucket. Корзина вмещает
+столько запросов, сколько разрешено за период, и равномерно пополняется;
+запрос без свободного токена отклоняется с заголовком Retry-After ещё до
+сериализаторов и обращений к базе. Представления с ThrottleFirstMixin
+проверяют лимиты даже раньше аутентификации, поэтому пользователь берётся
+из claim токена, а не из request.user. IP-адрес берётся из REMOTE_ADDR:
+NUM_PROXIES = 0 запрещает доверять заголовку X-Forwarded-For.
+
+Состояние корзин хранится в памяти процесса (THROTTLE_STORE = 'memory')
+или в кэше Django (THROTTLE_STORE = 'cache'), общем для всех процессов.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from api.authentication import ClaimsJWTAuthentication
+
+MEMORY_STORE_SIZE = 10000
+CACHE_KEY = 'throttle:{key}'
+
+
+class MemoryBucketStore:
+    """
+    Корзины в памяти процесса. Число корзин ограничено: давно не
+    использованные вытесняются, что равносильно их полному пополнению.
+    """
+
+    def __init__(self, size=MEMORY_STORE_SIZE):
+        self.size = size
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate):
+        with self._lock:
+            bucket = self._buckets.pop(key, None)
+            allowed, bucket, wait = take_token(
+                bucket, capacity, refill_rate, time.monotonic()
+            )
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.size:
+                self._buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Корзины в кэше Django. Чтение и запись корзины не атомарны, поэтому
+    при гонке параллельных процессов лимит может быть чуть превышен.
+    """
+
+    def consume(self, key, capacity, refill_rate):
+        cache_key = CACHE_KEY.format(key=key)
+        allowed, bucket, wait = take_token(
+            cache.get(cache_key), capacity, refill_rate, time.time()
+        )
+        cache.set(cache_key, bucket, timeout=int(capacity / refill_rate) + 1)
+        return allowed, wait
+
+    def clear(self):
+        """Корзины в кэше истекают сами."""
+
+
+def take_token(bucket, capacity, refill_rate, now):
+    """
+    Пополняет корзину (tokens, updated_at) за прошедшее время и забирает
+    из неё токен. Возвращает (разрешён ли запрос, корзина, сколько секунд
+    ждать следующего токена).
+    """
+    tokens, updated_at = bucket or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+    if tokens >= 1:
+        return True, (tokens - 1, now), None
+    return False, (tokens, now), (1 - tokens) / refill_rate
+
+
+memory_store = MemoryBucketStore()
+cache_store = CacheBucketStore()
+
+
+def get_store():
+    if getattr(settings, 'THROTTLE_STORE', 'memory') == 'cache':
+        return cache_store
+    return memory_store
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Throttle DRF с лимитом из DEFAULT_THROTTLE_RATES[scope]. Наследники
+    задают scope и ключ корзины в get_cache_key.
+    """
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        allowed, self.wait_seconds = get_store().consume(
+            self.key, self.num_requests, self.num_requests / self.duration
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SignupThrottle(TokenBucketThrottle):
+    """Регистрация: лимит на IP-адрес."""
+    scope = 'signup'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope, 'ident': self.get_ident(request)
+        }
+
+
+class AvailabilityThrottle(SignupThrottle):
+    """Проверка занятости юзернейма и емейла: лимит на IP-адрес."""
+    scope = 'availability'
+
+
+class ObtainTokenThrottle(TokenBucketThrottle):
+    """Получение токена: лимит на юзернейм, для которого подбирают код."""
+    scope = 'token'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': (
+                f'user:{username}' if isinstance(username, str)
+                else self.get_ident(request)
+            ),
+        }
+
+
+class WriteThrottle(TokenBucketThrottle):
+    """
+    Изменяющие запросы: лимит на пользователя из claim токена, для
+    анонимов и негодных токенов - на IP.
+    """
+    scope = 'writes'
+
+    def get_cache_key(self, request, view):
+        if request.method in SAFE_METHODS:
+            return None
+        user_id = ClaimsJWTAuthentication().get_token_user_id(request)
+        ident = (
+            f'user:{user_id}' if user_id is not None
+            else self.get_ident(request)
+        )
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class ThrottleFirstMixin:
+    """
+    Проверяет лимиты до аутентификации: лишний запрос отклоняется, не
+    загружая пользователя из базы. Throttles таких представлений не
+    должны обращаться к request.user.
+    """
+
+    def perform_authentication(self, request):
+        super().check_throttles(request)
+        super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        """Лимиты уже проверены в perform_authentication."""
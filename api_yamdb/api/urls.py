@@ -1,10 +1,13 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from api.views import (CategoryViewSet,
+from api.views import (AvailabilityView,
+                       CategoryViewSet,
+                       CommentExportView,
                        CommentViewSet,
                        GenreViewSet,
                        ObtainTokenView,
+                       ReviewExportView,
                        ReviewViewSet,
                        TitleViewSet,
                        UserSignupView,
@@ -30,5 +33,17 @@ router_v1.register(r'users', UsersViewSet, basename='users')
 urlpatterns = [
     path('v1/auth/signup/', UserSignupView.as_view(), name='signup'),
     path('v1/auth/token/', ObtainTokenView.as_view(), name='token_obtain'),
+    path(
+        'v1/auth/availability/', AvailabilityView.as_view(),
+        name='availability'
+    ),
+    path(
+        'v1/export/reviews/', ReviewExportView.as_view(),
+        name='export_reviews'
+    ),
+    path(
+        'v1/export/comments/', CommentExportView.as_view(),
+        name='export_comments'
+    ),
     path('v1/', include(router_v1.urls)),
 ]
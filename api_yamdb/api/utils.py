@@ -1,7 +1,6 @@
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
 
-from api_yamdb.settings import DEFAULT_FROM_EMAIL
+from users.outbox import enqueue_email
 
 
 def generate_confirmation_code(user):
@@ -13,7 +12,4 @@ def send_conform_mail(user):
     confirmation_code = generate_confirmation_code(user)
     subject = 'Ваш код подтверждения'
     message = f'Ваш код подтверждения {confirmation_code}'
-    recipient_list = [user.email]
-
-    send_mail(subject, message, DEFAULT_FROM_EMAIL, recipient_list,
-              fail_silently=False)
+    enqueue_email(subject, message, user.email)
@@ -1,16 +1,41 @@
+from collections import Counter
+
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Prefetch
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.filters import OrderingFilter
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 
-from api.filters import TitleFilter
+from api.bulk import (
+    CHUNK_SIZE,
+    CREATED,
+    ERROR,
+    UPDATED,
+    check_unique,
+    get_bulk_response,
+    get_items,
+    resolve_slugs,
+    validate_items
+)
+from api.cache import bump_version, defer_version_bumps
+from api.export import BaseExportView
+from api.filters import (
+    CommentExportFilter,
+    NormalizedSearchFilter,
+    ReviewExportFilter,
+    TitleFilter,
+    TitleSearchFilter
+)
+from api.pagination import PubDatePagination, TitlePagination, UserPagination
+from api.parsers import NDJSONParser
 from api.permissions import (
     IsAdmin,
     IsAdminOrReadOnly,
@@ -23,12 +48,25 @@ from api.serializers import (
     GenreSerializer,
     ReviewSerializer,
     SignupSerializer,
+    TitleBulkSerializer,
     TitleSerializer,
+    UsersBulkSerializer,
     UsersForMeSerializer,
     UsersSerializer
 )
-from api.viewsets import BaseCategoryGenreViewSet
-from reviews.models import Category, Genre, Review, Title
+from api.throttling import (
+    AvailabilityThrottle,
+    ObtainTokenThrottle,
+    SignupThrottle,
+    ThrottleFirstMixin
+)
+from api.viewsets import (
+    BaseCategoryGenreViewSet,
+    CachedListMixin,
+    ConditionalGetMixin
+)
+from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
+from users.bloom import user_index
 
 
 User = get_user_model()
@@ -42,6 +80,8 @@ class UserSignupView(APIView):
     - если пользователь уже существует, то на его email будет отправлено письмо
     с кодом подтверждения.
     """
+    throttle_classes = (SignupThrottle,)
+
     def post(self, request):
         serializer = SignupSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -53,15 +93,42 @@ class UserSignupView(APIView):
         return Response(response_data, status=status.HTTP_200_OK)
 
 
-class UsersViewSet(viewsets.ModelViewSet):
+class AvailabilityView(APIView):
+    """
+    Проверка, свободны ли юзернейм и емейл, для подсказок в форме
+    регистрации. Свободные значения отсекаются фильтром Блума без
+    запроса к базе.
+    """
+    throttle_classes = (AvailabilityThrottle,)
+    checks = {
+        'username': user_index.is_username_taken,
+        'email': user_index.is_email_taken,
+    }
+
+    def get(self, request):
+        response_data = {
+            field: {'value': value, 'available': not is_taken(value)}
+            for field, is_taken in self.checks.items()
+            if (value := request.query_params.get(field))
+        }
+        if not response_data:
+            return Response(
+                {'detail': 'Укажите username или email.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(response_data)
+
+
+class UsersViewSet(ThrottleFirstMixin, viewsets.ModelViewSet):
     """Класс для обработки запросов, связанных с пользователем."""
     queryset = User.objects.all()
     lookup_field = 'username'
     serializer_class = UsersSerializer
     permission_classes = (IsAdmin,)
+    pagination_class = UserPagination
     http_method_names = ('get', 'post', 'patch', 'delete')
-    filter_backends = (SearchFilter,)
-    search_fields = ('username',)
+    filter_backends = (NormalizedSearchFilter,)
+    search_fields = ('username_normalized',)
 
     @action(detail=False,
             methods=['get', 'patch'],
@@ -78,9 +145,67 @@ class UsersViewSet(viewsets.ModelViewSet):
             serializer.save()
             return Response(serializer.data)
 
+    @action(detail=False,
+            methods=['post'],
+            parser_classes=(JSONParser, NDJSONParser))
+    def bulk(self, request):
+        """
+        Массовое создание пользователей из JSON-массива или NDJSON.
+        Строки с ошибками пропускаются, остальные сохраняются.
+        """
+        results = {}
+        rows = validate_items(
+            UsersBulkSerializer(context=self.get_serializer_context()),
+            get_items(request.data), results
+        )
+        rows = check_unique(
+            User.objects.all(), ('username', 'email'), rows, results
+        )
+        self.create_users(rows, results)
+        return get_bulk_response(results)
+
+    @staticmethod
+    def create_users(rows, results):
+        """
+        Вставка пачкой через bulk_create. Если значение успел занять
+        параллельный запрос, строки сохраняются по одной, и конфликтная
+        строка получает ошибку.
+        """
+        users = [User(**data) for _, data in rows]
+        for user in users:
+            user.fill_search_fields()
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=CHUNK_SIZE)
+            created = users
+        except IntegrityError:
+            created = []
+            for (index, _), user in zip(rows, users):
+                try:
+                    with transaction.atomic():
+                        user.save()
+                except IntegrityError:
+                    results[index] = {
+                        'status': ERROR,
+                        'errors': {'detail': ['Пользователь уже существует.']}
+                    }
+                else:
+                    created.append(user)
+        for (index, _), user in zip(rows, users):
+            results.setdefault(
+                index, {'status': CREATED, 'username': user.username}
+            )
+        # bulk_create не отправляет post_save.
+        for user in created:
+            user_index.add(user)
+        if created:
+            bump_version(User)
+
 
 class ObtainTokenView(APIView):
     """Класс для обработки запроса на получение токена."""
+    throttle_classes = (ObtainTokenThrottle,)
+
     def post(self, request):
         serializer = ObtainTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -93,58 +218,232 @@ class CategoryViewSet(BaseCategoryGenreViewSet):
     """Класс для взаимодействия с Категориями."""
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    version_models = (Category,)
 
 
 class GenreViewSet(BaseCategoryGenreViewSet):
     """Класс для взаимодействия с Жанрами."""
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    version_models = (Genre,)
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ThrottleFirstMixin,
+                   ConditionalGetMixin,
+                   CachedListMixin,
+                   viewsets.ModelViewSet):
     """Класс для взаимодействия с Произведениями."""
-    queryset = Title.objects.annotate(rating=Avg('reviews__score')).all()
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related(
+        Prefetch('genre', queryset=Genre.objects.order_by('slug'))
+    )
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
+    pagination_class = TitlePagination
     http_method_names = ('get', 'post', 'patch', 'delete')
-    filter_backends = (DjangoFilterBackend, OrderingFilter,)
+    filter_backends = (DjangoFilterBackend, OrderingFilter, TitleSearchFilter)
     filterset_class = TitleFilter
     ordering = ('-year', 'name',)
+    version_models = (Title, GenreTitle, Category, Genre, Review)
+    authenticate_from_claims = True
 
+    @action(detail=False,
+            methods=['post', 'patch'],
+            parser_classes=(JSONParser, NDJSONParser))
+    def bulk(self, request):
+        """
+        Массовое создание (POST) или изменение (PATCH, с id у каждого
+        элемента) произведений из JSON-массива или NDJSON. Категории и
+        жанры всей пачки ищутся общими запросами, запись идёт в одной
+        транзакции, а версии кэша меняются один раз на пачку.
+        """
+        items = get_items(request.data)
+        partial = request.method == 'PATCH'
+        results = {}
+        rows = validate_items(
+            TitleBulkSerializer(
+                partial=partial, context=self.get_serializer_context()
+            ),
+            items, results
+        )
+        if partial:
+            rows, titles = self.get_bulk_titles(items, rows, results)
+        rows = resolve_slugs(Category.objects.all(), 'category', rows,
+                             results)
+        rows = resolve_slugs(Genre.objects.all(), 'genre', rows, results)
+        with defer_version_bumps(), transaction.atomic():
+            if partial:
+                self.update_titles(rows, titles, results)
+            else:
+                self.create_titles(rows, results)
+        return get_bulk_response(results)
+
+    @staticmethod
+    def get_bulk_titles(items, rows, results):
+        """
+        Находит изменяемые произведения одним in_bulk. Возвращает строки
+        с найденными произведениями и словарь «номер строки - объект».
+        """
+        ids = {}
+        for index, _ in rows:
+            title_id = items[index].get('id')
+            ids[index] = title_id if type(title_id) is int else None
+        counts = Counter(ids.values())
+        found = Title.objects.in_bulk(
+            [title_id for title_id in counts if title_id is not None]
+        )
+        valid = []
+        titles = {}
+        for index, data in rows:
+            title_id = ids[index]
+            if title_id not in found:
+                error = 'Произведение не найдено.'
+            elif counts[title_id] > 1:
+                error = 'Значение повторяется в запросе.'
+            else:
+                titles[index] = found[title_id]
+                valid.append((index, data))
+                continue
+            results[index] = {'status': ERROR, 'errors': {'id': [error]}}
+        return valid, titles
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    @staticmethod
+    def create_titles(rows, results):
+        titles = []
+        genres = []
+        for _, data in rows:
+            genres.append(data.pop('genre'))
+            titles.append(Title(**data))
+        if connection.features.can_return_rows_from_bulk_insert:
+            for title in titles:
+                title.fill_search_fields()
+            Title.objects.bulk_create(titles, batch_size=CHUNK_SIZE)
+            bump_version(Title)
+        else:
+            # Без RETURNING (SQLite в Django 3.2) bulk_create не заполняет
+            # id, поэтому строки вставляются по одной в той же транзакции.
+            for title in titles:
+                title.save()
+        Title.bulk_set_genres(dict(zip(titles, genres)))
+        for (index, _), title in zip(rows, titles):
+            results[index] = {'status': CREATED, 'id': title.pk}
+
+    @staticmethod
+    def update_titles(rows, titles, results):
+        fields = set()
+        genres = {}
+        for index, data in rows:
+            title = titles[index]
+            if 'genre' in data:
+                genres[title] = data.pop('genre')
+            for field, value in data.items():
+                setattr(title, field, value)
+            fields.update(data)
+            title.fill_search_fields()
+            results[index] = {'status': UPDATED, 'id': title.pk}
+        if fields:
+            Title.objects.bulk_update(
+                [titles[index] for index, _ in rows],
+                {*fields, 'name_normalized', 'search_document'},
+                batch_size=CHUNK_SIZE
+            )
+            bump_version(Title)
+        if genres:
+            Title.bulk_set_genres(genres)
+
+
+class ReviewViewSet(ThrottleFirstMixin,
+                    ConditionalGetMixin,
+                    viewsets.ModelViewSet):
     """Отображение отзыва."""
 
     serializer_class = ReviewSerializer
     permission_classes = (IsAllowedToEditOrReadOnly,)
+    pagination_class = PubDatePagination
+    version_models = (Review, Title, User)
+    authenticate_from_claims = True
     http_method_names = ('get', 'post', 'patch', 'delete',)
 
+    def check_parent(self):
+        self.get_title()
+
     def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        """
+        Произведение из URL. Экземпляр представления живёт один запрос,
+        поэтому найденный объект запоминается на нём и переиспользуется
+        сериализатором и проверками прав.
+        """
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.get_title().reviews.select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, title=self.get_title())
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ThrottleFirstMixin,
+                     ConditionalGetMixin,
+                     viewsets.ModelViewSet):
     """Отображение коммента."""
 
     serializer_class = CommentSerializer
     permission_classes = (IsAllowedToEditOrReadOnly,)
+    pagination_class = PubDatePagination
+    version_models = (Comment, Review, Title, User)
+    authenticate_from_claims = True
     http_method_names = ('get', 'post', 'patch', 'delete',)
 
+    def check_parent(self):
+        self.get_review()
+
     def get_review(self):
-        return get_object_or_404(
-            Review,
-            pk=self.kwargs.get('review_id'),
-            title__id=self.kwargs.get('title_id')
-        )
+        """Отзыв из URL, найденный один раз за запрос."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get('review_id'),
+                title__id=self.kwargs.get('title_id')
+            )
+        return self._review
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.get_review().comments.select_related('author')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user, review=self.get_review())
+
+
+class ReviewExportView(BaseExportView):
+    """Выгрузка отзывов для администратора."""
+
+    filterset_class = ReviewExportFilter
+    export_fields = (
+        ('id', 'id'),
+        ('title_id', 'title_id'),
+        ('text', 'text'),
+        ('author', 'author__username'),
+        ('score', 'score'),
+        ('pub_date', 'pub_date'),
+    )
+    filename = 'reviews'
+
+
+class CommentExportView(BaseExportView):
+    """Выгрузка комментариев для администратора."""
+
+    filterset_class = CommentExportFilter
+    export_fields = (
+        ('id', 'id'),
+        ('title_id', 'review__title_id'),
+        ('review_id', 'review_id'),
+        ('text', 'text'),
+        ('author', 'author__username'),
+        ('pub_date', 'pub_date'),
+    )
+    filename = 'comments'
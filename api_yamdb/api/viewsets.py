@@ -1,16 +1,101 @@
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework import mixins, viewsets
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 
+from api.cache import (
+    get_cached_response_data,
+    get_conditional_markers,
+    get_response_cache_key,
+    set_cached_response_data,
+)
+from api.filters import NormalizedSearchFilter
 from api.permissions import IsAdminOrReadOnly
+from api.throttling import ThrottleFirstMixin
 
 
-class BaseCategoryGenreViewSet(mixins.CreateModelMixin,
+class CachedListMixin:
+    """
+    Кэширует ответ списка для анонимных пользователей. Ключ строится по
+    нормализованной строке запроса и версиям моделей из version_models,
+    поэтому любая запись в эти модели делает старые ответы недоступными.
+    """
+    version_models = ()
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        key = get_response_cache_key(
+            self.basename, request, self.version_models
+        )
+        data = get_cached_response_data(self.basename, key)
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        set_cached_response_data(key, response.data)
+        return response
+
+
+class ConditionalListMixin:
+    """
+    Добавляет к списку ETag и Last-Modified, вычисленные по версиям
+    моделей из version_models. На совпавший If-None-Match или
+    If-Modified-Since отвечает 304 без запроса к базе и сериализации.
+    """
+    version_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        self.check_parent()
+        etag, last_modified = get_conditional_markers(
+            request,
+            self.version_models,
+            self.basename,
+            self.action,
+            repr(sorted(kwargs.items())),
+            request.accepted_renderer.format,
+        )
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def check_parent(self):
+        """
+        Проверяет родительский объект из URL: без него ответ 404, а не
+        304. Вложенные представления переопределяют метод.
+        """
+
+
+class ConditionalGetMixin(ConditionalListMixin):
+    """То же для списка и отдельного объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class BaseCategoryGenreViewSet(ThrottleFirstMixin,
+                               ConditionalListMixin,
+                               mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                mixins.ListModelMixin,
                                viewsets.GenericViewSet):
     """Базовый класс для взаимодействия с категориями и жанрами."""
     permission_classes = (IsAdminOrReadOnly,)
-    filter_backends = (SearchFilter, OrderingFilter,)
-    search_fields = ('name',)
+    filter_backends = (NormalizedSearchFilter, OrderingFilter,)
+    search_fields = ('name_normalized',)
     lookup_field = 'slug'
     ordering = ('slug',)
+    authenticate_from_claims = True
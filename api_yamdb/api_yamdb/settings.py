@@ -1,3 +1,5 @@
+import os
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 
@@ -72,6 +74,46 @@ DATABASES = {
 }
 
 
+# Cache
+
+# Версии моделей, закэшированные ответы, счётчики cache_stats и корзины
+# throttling должны быть общими для всех процессов, поэтому кэш
+# в памяти процесса (LocMemCache) запрещён проверкой api.E001. По
+# умолчанию - файловый кэш, общий для процессов одного сервера; при
+# нескольких серверах укажите общий бэкенд, например Memcached.
+CACHE_BACKEND = os.getenv(
+    'DJANGO_CACHE_BACKEND',
+    'django.core.cache.backends.filebased.FileBasedCache'
+)
+
+# Ответы API: переполненный кэш удаляет часть записей.
+# Версии моделей и счётчики хранятся отдельно (STATE_CACHE): их немного,
+# и вместе с ответами они не вытесняются - иначе вытесненная версия
+# сбрасывала бы все ответы, а счётчики обнулялись.
+STATE_CACHE = 'state'
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv(
+            'DJANGO_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'api_yamdb_cache')
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    STATE_CACHE: {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv(
+            'DJANGO_STATE_CACHE_LOCATION',
+            os.path.join(tempfile.gettempdir(), 'api_yamdb_state')
+        ),
+    },
+}
+
+# Время жизни закэшированных ответов API, в секундах.
+RESPONSE_CACHE_TIMEOUT = 300
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,19 +155,58 @@ AUTH_USER_MODEL = 'users.MdbUser'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.DepthLimitedPageNumberPagination',
     'PAGE_SIZE': 5,
 
-    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
+    'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+
+    'DEFAULT_THROTTLE_CLASSES': ['api.throttling.WriteThrottle'],
+    # Клиенты обращаются к приложению напрямую: IP берётся из REMOTE_ADDR,
+    # а X-Forwarded-For, который клиент может подделать, не учитывается.
+    'NUM_PROXIES': 0,
+    'DEFAULT_THROTTLE_RATES': {
+        'signup': '10/min',
+        'availability': '60/min',
+        'token': '10/min',
+        'writes': '120/min',
+    },
 }
 
+# Где хранить корзины throttling: 'memory' - в памяти процесса,
+# 'cache' - в кэше Django, общем для нескольких процессов.
+THROTTLE_STORE = 'memory'
+
+# Наибольшее число объектов в одном запросе к массовым эндпоинтам.
+BULK_MAX_ITEMS = 10000
+
+# Страницы глубже этой отдаются только в режиме ?pagination=cursor.
+PAGINATION_MAX_PAGE_DEPTH = 100
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Как часто (в секундах) процесс сверяет с базой список отозванных токенов.
+TOKEN_REVOCATION_POLL_INTERVAL = 5
+
+# Фильтр Блума занятых юзернеймов и емейлов: ожидаемое число
+# пользователей, доля ложных срабатываний, как часто (в секундах) искать
+# в базе новых пользователей и период полного перестроения.
+USER_BLOOM_CAPACITY = 100000
+USER_BLOOM_ERROR_RATE = 0.01
+USER_BLOOM_POLL_INTERVAL = 5
+USER_BLOOM_REBUILD_INTERVAL = 3600
+
+# Число проверенных JWT, которые процесс держит в памяти; 0 - без кэша.
+JWT_CACHE_SIZE = 1024
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
 DEFAULT_FROM_EMAIL = 'yamdb@example.com'
+
+# Отправлять письма из очереди сразу после фиксации транзакции, а не
+# командой send_outbox. Удобно при разработке и в тестах.
+EMAIL_OUTBOX_EAGER = False
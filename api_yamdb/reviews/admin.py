@@ -33,7 +33,7 @@ class GenreTitleInline(admin.TabularInline):
 
 @admin.register(Title)
 class TitleAdmin(admin.ModelAdmin):
-    list_display = ('name', 'year', 'category', 'description')
+    list_display = ('name', 'year', 'category', 'rating', 'description')
     list_display_links = ('name',)
     search_fields = ('name', 'category')
     list_filter = ('year', 'category')
@@ -0,0 +1,110 @@
+"""
+Индекс FTS5 по поисковым документам произведений (только SQLite).
+
+Таблица индекса хранит лишь ссылки на reviews_title.search_document
+(external content) и обновляется триггерами на reviews_title. SQLite
+пересоздаёт таблицу при изменении её схемы и теряет при этом триггеры,
+поэтому после каждой миграции они проверяются и при необходимости
+создаются заново вместе с перестроением индекса.
+"""
+from functools import lru_cache
+
+from django.db import OperationalError, connections
+
+FTS_TABLE = 'reviews_title_fts'
+
+CREATE_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        search_document,
+        content='reviews_title',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 0'
+    )
+"""
+
+TRIGGERS_SQL = {
+    f'{FTS_TABLE}_insert': f"""
+        CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON reviews_title
+        BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, search_document)
+            VALUES (new.id, new.search_document);
+        END
+    """,
+    f'{FTS_TABLE}_delete': f"""
+        CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON reviews_title
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document)
+            VALUES ('delete', old.id, old.search_document);
+        END
+    """,
+    f'{FTS_TABLE}_update': f"""
+        CREATE TRIGGER {FTS_TABLE}_update
+        AFTER UPDATE OF search_document ON reviews_title
+        BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document)
+            VALUES ('delete', old.id, old.search_document);
+            INSERT INTO {FTS_TABLE}(rowid, search_document)
+            VALUES (new.id, new.search_document);
+        END
+    """,
+}
+
+REBUILD_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(probe)'
+            )
+        except OperationalError:
+            return False
+        cursor.execute('DROP TABLE temp.fts5_probe')
+    return True
+
+
+def create_fts_index(connection):
+    """Создаёт индекс, если база его поддерживает."""
+    if not fts5_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(CREATE_TABLE_SQL)
+    ensure_fts_triggers(connection, rebuild=True)
+
+
+def ensure_fts_triggers(connection, rebuild=False):
+    """Восстанавливает потерянные триггеры и перестраивает индекс."""
+    if FTS_TABLE not in connection.introspection.table_names():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in TRIGGERS_SQL if name not in existing]
+        for name in missing:
+            cursor.execute(TRIGGERS_SQL[name])
+        if missing or rebuild:
+            cursor.execute(REBUILD_SQL)
+
+
+def drop_fts_index(connection):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in TRIGGERS_SQL:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+@lru_cache(maxsize=None)
+def fts_enabled(alias):
+    """Есть ли в базе индекс FTS5 для поиска по произведениям."""
+    connection = connections[alias]
+    return (
+        connection.vendor == 'sqlite'
+        and FTS_TABLE in connection.introspection.table_names()
+    )
@@ -0,0 +1,100 @@
+import csv
+import gzip
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from reviews.management.commands.import_csv import CSV_FILES
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Колонки файлов в том порядке, в котором их читает import_csv.
+CSV_COLUMNS = {
+    'users.csv': (
+        'id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'
+    ),
+    'category.csv': ('id', 'name', 'slug'),
+    'genre.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category', 'description'),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+
+
+def format_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def open_output(filepath, compress):
+    if compress:
+        return gzip.open(
+            f'{filepath}.gz', 'wt', newline='', encoding='utf-8'
+        )
+    return open(filepath, 'w', newline='', encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Export the database into CSV files readable by import_csv'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory', type=str, help='Directory to write CSV files to'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Number of rows fetched from the database at once'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help='Write gzip-compressed .csv.gz files'
+        )
+
+    def handle(self, *args, **kwargs):
+        directory = kwargs['directory']
+        os.makedirs(directory, exist_ok=True)
+        # Все файлы читаются в одной транзакции и поэтому согласованы
+        # между собой даже при параллельной записи в базу.
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, '
+                        'READ ONLY'
+                    )
+            for filename in CSV_COLUMNS:
+                self.export_file(
+                    filename, os.path.join(directory, filename),
+                    kwargs['chunk_size'], kwargs['gzip']
+                )
+
+    def export_file(self, filename, filepath, chunk_size, compress):
+        """
+        Строки выбираются итератором по кускам chunk_size (на PostgreSQL -
+        через серверный курсор), так что память не зависит от размера
+        таблицы.
+        """
+        model, columns = CSV_FILES[filename]
+        header = CSV_COLUMNS[filename]
+        rows = model.objects.order_by('pk').values_list(
+            *(columns.get(column, column) for column in header)
+        ).iterator(chunk_size=chunk_size)
+        started = time.monotonic()
+        count = 0
+        with open_output(filepath, compress) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow([format_value(value) for value in row])
+                count += 1
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully exported {filename}: {count} rows in '
+            f'{elapsed:.2f}s ({count / max(elapsed, 1e-6):.0f} rows/sec)'
+        ))
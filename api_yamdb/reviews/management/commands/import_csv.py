@@ -1,21 +1,262 @@
 import csv
+import hashlib
+import io
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from graphlib import TopologicalSorter
+from itertools import islice
 
+from django.apps import apps
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.color import no_style
+from django.db import connection, transaction
 
+from api.cache import bump_version
+from reviews.management.workers import init_worker
 from reviews.models import (
     Category,
     Comment,
     Genre,
     GenreTitle,
+    ImportCheckpoint,
     Review,
     Title,
 )
 
 User = get_user_model()
 
+DEFAULT_BATCH_SIZE = 1000
+
+# Файл выгрузки: модель и переименования колонок в поля модели.
+CSV_FILES = {
+    'users.csv': (User, {}),
+    'category.csv': (Category, {}),
+    'genre.csv': (Genre, {}),
+    'titles.csv': (Title, {'category': 'category_id'}),
+    'genre_title.csv': (GenreTitle, {}),
+    'review.csv': (Review, {'author': 'author_id'}),
+    'comments.csv': (Comment, {'author': 'author_id'}),
+}
+
+# Поля, которые модель вычисляет из колонок файла в fill_search_fields.
+DERIVED_FIELDS = {
+    User: ('username_normalized',),
+    Category: ('name_normalized',),
+    Genre: ('name_normalized',),
+    Title: ('name_normalized', 'search_document'),
+}
+
+
+def get_import_order(filenames):
+    """
+    Упорядочивает файлы по графу внешних ключей: модель загружается
+    после всех моделей, на которые она ссылается.
+    """
+    models = {CSV_FILES[filename][0]: filename for filename in filenames}
+    graph = {
+        model: {
+            field.related_model for field in model._meta.concrete_fields
+            if field.is_relation and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+    return [models[model] for model in TopologicalSorter(graph).static_order()]
+
+
+def iter_lines(binary_file):
+    """
+    Строки файла, прочитанные через readline: в отличие от итерации
+    по текстовому файлу это не мешает узнавать позицию через tell().
+    """
+    for line in iter(binary_file.readline, b''):
+        yield line.decode('utf-8')
+
+
+def get_fieldnames(filepath):
+    with open(filepath, newline='', encoding='utf-8') as csvfile:
+        return next(csv.reader(csvfile))
+
+
+def read_batches(filepath, batch_size, offset=0):
+    """
+    Построчно читает CSV, начиная с байтового смещения offset, и отдаёт
+    пачки по batch_size строк вместе со смещением начала следующей пачки.
+    """
+    with open(filepath, 'rb') as csvfile:
+        fieldnames = next(csv.reader(iter_lines(csvfile)))
+        if offset:
+            csvfile.seek(offset)
+        rows = csv.DictReader(iter_lines(csvfile), fieldnames=fieldnames)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch, csvfile.tell()
+
+
+def read_ranges(filepath, batch_size, offset=0):
+    """
+    Границы пачек по batch_size строк: пары байтовых смещений (начало,
+    конец). Строки не разбираются - конец записи определяется по чётному
+    числу кавычек, так что перевод строки внутри кавычек её не обрывает.
+    """
+    with open(filepath, 'rb') as csvfile:
+        next(csv.reader(iter_lines(csvfile)))
+        if offset:
+            csvfile.seek(offset)
+        start = csvfile.tell()
+        rows = quotes = 0
+        for line in iter(csvfile.readline, b''):
+            quotes += line.count(b'"')
+            if quotes % 2:
+                continue
+            quotes = 0
+            rows += 1
+            if rows == batch_size:
+                end = csvfile.tell()
+                yield start, end
+                start, rows = end, 0
+        if rows:
+            yield start, csvfile.tell()
+
+
+def build_object(model, columns, row):
+    """Модель из строки CSV с приведёнными к типам полей значениями."""
+    values = {}
+    for column, value in row.items():
+        name = columns.get(column, column)
+        field = model._meta.get_field(name)
+        if value == '' and field.null:
+            value = None
+        values[name] = field.to_python(value)
+    obj = model(**values)
+    if hasattr(obj, 'fill_search_fields'):
+        obj.fill_search_fields()
+    return obj
+
+
+@contextmanager
+def keep_file_dates(model, columns, fieldnames):
+    """
+    Отключает auto_now_add у полей, которые есть в файле: иначе
+    bulk_create заменит даты из выгрузки временем загрузки.
+    """
+    names = {columns.get(column, column) for column in fieldnames}
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False) and field.attname in names
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def get_upsert_fields(model, columns, fieldnames):
+    """
+    Поля, которые сравниваются и обновляются при --upsert: колонки файла
+    и вычисляемые из них поля поиска. Первичный ключ и даты auto_now_add
+    не меняются, рейтинг и прочие поля вне файла не затрагиваются.
+    """
+    names = [columns.get(column, column) for column in fieldnames]
+    fields = [
+        model._meta.get_field(name)
+        for name in names + list(DERIVED_FIELDS.get(model, ()))
+    ]
+    return [
+        field for field in fields
+        if not field.primary_key and not getattr(field, 'auto_now_add', False)
+    ]
+
+
+def hash_prefix(filepath, size):
+    """MD5 первых size байт файла; к нему можно дописывать следующие."""
+    hasher = hashlib.md5()
+    with open(filepath, 'rb') as source:
+        while size > 0:
+            chunk = source.read(min(size, 1 << 20))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size -= len(chunk)
+    return hasher
+
+
+def get_row_hash(obj, fields):
+    return hashlib.md5('\x1f'.join(
+        repr(field.value_from_object(obj)) for field in fields
+    ).encode()).digest()
+
+
+def upsert_objects(model, objects, fields):
+    """
+    Вставляет новые строки пачки и обновляет изменившиеся. Строки
+    сравниваются по хэшу содержимого, неизменные не записываются.
+    """
+    existing = model.objects.only(
+        *(field.name for field in fields)
+    ).in_bulk([obj.pk for obj in objects])
+    created = [obj for obj in objects if obj.pk not in existing]
+    changed = [
+        obj for obj in objects
+        if obj.pk in existing
+        and get_row_hash(obj, fields) != get_row_hash(existing[obj.pk], fields)
+    ]
+    model.objects.bulk_create(created)
+    if changed:
+        model.objects.bulk_update(changed, [field.name for field in fields])
+    return len(created), len(changed)
+
+
+def convert_range(label, columns, filepath, start, end):
+    """
+    Читает и разбирает пачку прямо в процессе-обработчике: он получает
+    только границы пачки в файле, а возвращает значения полей кортежами
+    в порядке concrete_fields - их дешевле сериализовать, чем объекты
+    или словари.
+    """
+    model = apps.get_model(label)
+    fields = model._meta.concrete_fields
+    fieldnames = get_fieldnames(filepath)
+    with open(filepath, 'rb') as csvfile:
+        csvfile.seek(start)
+        text = csvfile.read(end - start).decode('utf-8')
+    rows = csv.DictReader(io.StringIO(text, newline=''), fieldnames=fieldnames)
+    return [
+        tuple(getattr(obj, field.attname) for field in fields)
+        for obj in (build_object(model, columns, row) for row in rows)
+    ]
+
+
+def convert_in_pool(executor, label, columns, filepath, ranges, window):
+    """
+    Разбирает пачки в пуле процессов, сохраняя их порядок. В работе
+    одновременно не больше window пачек, поэтому память не растёт
+    с размером файла.
+    """
+    pending = deque()
+    for start, end in ranges:
+        pending.append((
+            executor.submit(
+                convert_range, label, columns, filepath, start, end
+            ),
+            end
+        ))
+        if len(pending) >= window:
+            future, end = pending.popleft()
+            yield future.result(), end
+    while pending:
+        future, end = pending.popleft()
+        yield future.result(), end
+
 
 class Command(BaseCommand):
     help = 'Import CSV files into the database'
@@ -24,125 +265,201 @@ class Command(BaseCommand):
         parser.add_argument(
             'directory', type=str, help='Directory containing CSV files'
         )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Number of rows inserted and committed at once'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of processes parsing CSV rows'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Continue from the last committed batch of each file'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Insert new rows and update changed ones by id'
+        )
+        parser.add_argument(
+            '--delete', action='store_true',
+            help='With --upsert, delete rows missing from the files'
+        )
 
-    @transaction.atomic
     def handle(self, *args, **kwargs):
-        directory = kwargs['directory']
+        workers = kwargs['workers']
+        if workers > 1:
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=init_worker
+            ) as executor:
+                self.import_directory(executor, **kwargs)
+        else:
+            self.import_directory(None, **kwargs)
 
-        for filename in os.listdir(directory):
+    def import_directory(self, executor, **kwargs):
+        directory = kwargs['directory']
+        filenames = [
+            filename for filename in os.listdir(directory)
+            if filename in CSV_FILES
+        ]
+        filenames = get_import_order(filenames)
+        for filename in filenames:
             filepath = os.path.join(directory, filename)
-            if filename == 'category.csv':
-                self.import_categories(filepath)
-            elif filename == 'comments.csv':
-                self.import_comments(filepath)
-            elif filename == 'genre_title.csv':
-                self.import_genre_titles(filepath)
-            elif filename == 'genre.csv':
-                self.import_genres(filepath)
-            elif filename == 'review.csv':
-                self.import_reviews(filepath)
-            elif filename == 'titles.csv':
-                self.import_titles(filepath)
-            elif filename == 'users.csv':
-                self.import_users(filepath)
-
-    def import_categories(self, filepath):
-        with open(filepath, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Category.objects.create(
-                    id=row['id'],
-                    name=row['name'],
-                    slug=row['slug']
+            checkpoint = self.get_checkpoint(filepath, kwargs['resume'])
+            if checkpoint.done:
+                self.stdout.write(f'Skipped {filename}: already imported')
+                continue
+            batches = self.read_objects(
+                executor, filepath, checkpoint.offset, **kwargs
+            )
+            fields = None
+            if kwargs['upsert']:
+                model, columns = CSV_FILES[filename]
+                fields = get_upsert_fields(
+                    model, columns, get_fieldnames(filepath)
                 )
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully imported {filepath}')
-        )
+            self.import_file(checkpoint, filepath, batches, fields)
+        if kwargs['upsert'] and kwargs['delete']:
+            for filename in reversed(filenames):
+                self.delete_missing(os.path.join(directory, filename))
+        self.finish([CSV_FILES[filename][0] for filename in filenames])
 
-    def import_comments(self, filepath):
-        with open(filepath, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Comment.objects.create(
-                    id=row['id'],
-                    review_id=row['review_id'],
-                    text=row['text'],
-                    author_id=row['author'],
-                    pub_date=row['pub_date']
-                )
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully imported {filepath}')
+    def get_checkpoint(self, filepath, resume):
+        """
+        Контрольная точка файла. При --resume она действует, только если
+        уже загруженная часть файла (до offset) не изменилась: иначе это
+        другая выгрузка, и файл загружается с начала.
+        """
+        filename = os.path.basename(filepath)
+        checkpoint, created = ImportCheckpoint.objects.get_or_create(
+            filename=filename
         )
+        if created:
+            resume = False
+        elif resume and hash_prefix(
+            filepath, checkpoint.offset
+        ).hexdigest() != checkpoint.digest:
+            self.stdout.write(self.style.WARNING(
+                f'Checkpoint of {filename} was made for another file '
+                f'({checkpoint.source}), importing it from the start'
+            ))
+            resume = False
+        if not resume:
+            checkpoint.offset = checkpoint.rows = 0
+            checkpoint.last_id = ''
+            checkpoint.done = False
+        checkpoint.source = os.path.abspath(filepath)
+        checkpoint.save()
+        return checkpoint
 
-    def import_genre_titles(self, filepath):
-        with open(filepath, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                GenreTitle.objects.create(
-                    id=row['id'],
-                    title_id=row['title_id'],
-                    genre_id=row['genre_id']
+    def read_objects(self, executor, filepath, offset, **kwargs):
+        """Пачки объектов модели и смещения, после которых они кончаются."""
+        model, columns = CSV_FILES[os.path.basename(filepath)]
+        if executor is None:
+            return (
+                ([build_object(model, columns, row) for row in rows], offset)
+                for rows, offset in read_batches(
+                    filepath, kwargs['batch_size'], offset
                 )
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully imported {filepath}')
+            )
+        ranges = read_ranges(filepath, kwargs['batch_size'], offset)
+        return (
+            ([model(*values) for values in batch], offset)
+            for batch, offset in convert_in_pool(
+                executor, model._meta.label, columns, filepath, ranges,
+                window=kwargs['workers'] * 2
+            )
         )
 
-    def import_genres(self, filepath):
-        with open(filepath, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Genre.objects.create(
-                    id=row['id'],
-                    name=row['name'],
-                    slug=row['slug']
-                )
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully imported {filepath}')
-        )
+    def import_file(self, checkpoint, filepath, batches, upsert_fields=None):
+        """
+        Единственный писатель: пачки записываются в порядке файла, и каждая
+        фиксируется в своей транзакции вместе с контрольной точкой и хэшем
+        загруженной части файла. Если переданы upsert_fields, существующие
+        строки обновляются по ним.
+        """
+        model = CSV_FILES[checkpoint.filename][0]
+        started = time.monotonic()
+        count = created = changed = 0
+        hasher = hash_prefix(filepath, checkpoint.offset)
+        columns = CSV_FILES[checkpoint.filename][1]
+        with keep_file_dates(
+            model, columns, get_fieldnames(filepath)
+        ), open(filepath, 'rb') as source:
+            source.seek(checkpoint.offset)
+            for objects, offset in batches:
+                hasher.update(source.read(offset - source.tell()))
+                with transaction.atomic():
+                    if upsert_fields is None:
+                        model.objects.bulk_create(objects)
+                        batch_created, batch_changed = len(objects), 0
+                    else:
+                        batch_created, batch_changed = upsert_objects(
+                            model, objects, upsert_fields
+                        )
+                    checkpoint.offset = offset
+                    checkpoint.digest = hasher.hexdigest()
+                    checkpoint.rows += len(objects)
+                    checkpoint.last_id = str(objects[-1].pk)
+                    checkpoint.save()
+                count += len(objects)
+                created += batch_created
+                changed += batch_changed
+        checkpoint.done = True
+        checkpoint.save()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully imported {checkpoint.filename}: {count} rows '
+            f'({created} inserted, {changed} updated, '
+            f'{count - created - changed} unchanged) in {elapsed:.2f}s '
+            f'({count / max(elapsed, 1e-6):.0f} rows/sec)'
+        ))
 
-    def import_reviews(self, filepath):
-        with open(filepath, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Review.objects.create(
-                    id=row['id'],
-                    title_id=row['title_id'],
-                    text=row['text'],
-                    author_id=row['author'],
-                    score=row['score'],
-                    pub_date=row['pub_date']
-                )
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully imported {filepath}')
+    def delete_missing(self, filepath):
+        """
+        Удаляет строки, которых нет в файле. Ключи перечитываются из файла,
+        поэтому удаление корректно и после --resume.
+        """
+        model, columns = CSV_FILES[os.path.basename(filepath)]
+        pk = model._meta.pk
+        column = next(
+            column for column in get_fieldnames(filepath)
+            if columns.get(column, column) == pk.attname
         )
+        ids = {
+            pk.to_python(row[column])
+            for rows, _ in read_batches(filepath, DEFAULT_BATCH_SIZE)
+            for row in rows
+        }
+        stale = [
+            obj_id for obj_id in model.objects.values_list(
+                'pk', flat=True
+            ).iterator() if obj_id not in ids
+        ]
+        for start in range(0, len(stale), DEFAULT_BATCH_SIZE):
+            with transaction.atomic():
+                model.objects.filter(
+                    pk__in=stale[start:start + DEFAULT_BATCH_SIZE]
+                ).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {len(stale)} rows missing from '
+            f'{os.path.basename(filepath)}'
+        ))
 
-    def import_titles(self, filepath):
-        with open(filepath, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                Title.objects.create(
-                    id=row['id'],
-                    name=row['name'],
-                    year=row['year'],
-                    category_id=row['category']
-                )
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully imported {filepath}')
-        )
+    @transaction.atomic
+    def finish(self, models):
+        """
+        Досчитывает то, что при поштучном create делали сигналы:
+        рейтинги произведений, последовательности ключей и версии кэша.
+        """
+        if Title in models or Review in models:
+            Title.objects.recalculate_rating()
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
 
-    def import_users(self, filepath):
-        with open(filepath, newline='', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                User.objects.create(
-                    id=row['id'],
-                    username=row['username'],
-                    email=row['email'],
-                    role=row['role'],
-                    bio=row['bio'],
-                    first_name=row['first_name'],
-                    last_name=row['last_name']
-                )
-        self.stdout.write(
-            self.style.SUCCESS(f'Successfully imported {filepath}')
-        )
+        def bump_versions():
+            for model in models:
+                bump_version(model)
+
+        transaction.on_commit(bump_versions)
@@ -0,0 +1,10 @@
+"""
+Инициализация процессов-обработчиков import_csv. Модуль не импортирует
+моделей: при запуске через spawn (macOS, Windows) он загружается в новом
+процессе раньше, чем настроен Django.
+"""
+import django
+
+
+def init_worker():
+    django.setup()
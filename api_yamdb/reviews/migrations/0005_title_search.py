@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 19:57
+
+from django.db import migrations, models
+
+from reviews import fts
+from reviews.search import build_search_document
+
+
+def fill_search_documents(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    titles = Title.objects.only('name', 'description')
+    for title in titles.iterator():
+        title.search_document = build_search_document(
+            title.name, title.description
+        )
+        title.save(update_fields=('search_document',))
+
+
+def create_fts_index(apps, schema_editor):
+    """
+    Индекс FTS5 создаётся только на SQLite, собранной с FTS5.
+    В остальных случаях поиск работает по search_document без индекса.
+    """
+    fts.create_fts_index(schema_editor.connection)
+
+
+def drop_fts_index(apps, schema_editor):
+    fts.drop_fts_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False, verbose_name='Поисковый документ'),
+        ),
+        migrations.RunPython(
+            fill_search_documents, migrations.RunPython.noop
+        ),
+        migrations.RunPython(create_fts_index, drop_fts_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+from reviews.search import normalize_name
+
+
+def fill_normalized_names(apps, schema_editor):
+    for model_name in ('Category', 'Genre', 'Title'):
+        model = apps.get_model('reviews', model_name)
+        objects = list(model.objects.only('name'))
+        for obj in objects:
+            obj.name_normalized = normalize_name(obj.name)
+        model.objects.bulk_update(
+            objects, ('name_normalized',), batch_size=500
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='name_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=256),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='genre',
+            name='name_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=256),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='name_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=256),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_normalized_names, migrations.RunPython.noop),
+    ]
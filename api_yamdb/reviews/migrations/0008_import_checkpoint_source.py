@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 21:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importcheckpoint',
+            name='digest',
+            field=models.CharField(blank=True, max_length=32, verbose_name='MD5 загруженной части файла'),
+        ),
+        migrations.AddField(
+            model_name='importcheckpoint',
+            name='source',
+            field=models.CharField(blank=True, max_length=1024, verbose_name='Путь к файлу'),
+        ),
+    ]
@@ -3,7 +3,10 @@ from django.core.validators import (
     MaxValueValidator,
     MinValueValidator,
 )
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, NullIf
+from django.db.models.signals import m2m_changed
 
 from reviews.constants import (
     DEFAULT_VALUE,
@@ -12,6 +15,7 @@ from reviews.constants import (
     TEXT_LENGTH,
     NAME_LENGTH,
 )
+from reviews.search import build_search_document, normalize_name
 from reviews.validators import validate_year
 
 
@@ -21,6 +25,9 @@ User = get_user_model()
 class BaseCategoryGenre(models.Model):
     """Абстрактная модель для Категорий и Жанров."""
     name = models.CharField('Название', max_length=NAME_LENGTH)
+    name_normalized = models.CharField(
+        max_length=NAME_LENGTH, db_index=True, editable=False
+    )
     slug = models.SlugField(max_length=50, unique=True)
 
     class Meta:
@@ -29,6 +36,14 @@ class BaseCategoryGenre(models.Model):
     def __str__(self):
         return self.name[:TEXT_LENGTH]
 
+    def save(self, *args, **kwargs):
+        self.fill_search_fields()
+        super().save(*args, **kwargs)
+
+    def fill_search_fields(self):
+        """Заполняет теневые поля для поиска; bulk_create не вызывает save."""
+        self.name_normalized = normalize_name(self.name)
+
 
 class Category(BaseCategoryGenre):
     """Модель Категории."""
@@ -44,9 +59,51 @@ class Genre(BaseCategoryGenre):
         verbose_name_plural = 'Жанры'
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def apply_review_delta(self, score_delta, count_delta):
+        """
+        Атомарно изменяет сумму оценок и число отзывов произведений
+        и пересчитывает рейтинг в том же UPDATE.
+        """
+        rating_sum = F('rating_sum') + score_delta
+        review_count = F('review_count') + count_delta
+        return self.update(
+            rating_sum=rating_sum,
+            review_count=review_count,
+            rating=rating_sum / NullIf(review_count, 0),
+        )
+
+    def recalculate_rating(self):
+        """Полностью пересчитывает рейтинг произведений по их отзывам."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        self.update(
+            rating_sum=Coalesce(
+                Subquery(
+                    reviews.annotate(total=Sum('score')).values('total')
+                ),
+                0
+            ),
+            review_count=Coalesce(
+                Subquery(
+                    reviews.annotate(total=Count('pk')).values('total')
+                ),
+                0
+            ),
+        )
+        return self.update(
+            rating=F('rating_sum') / NullIf(F('review_count'), 0)
+        )
+
+
 class Title(models.Model):
     """Модель Произведения."""
     name = models.CharField('Название', max_length=NAME_LENGTH)
+    name_normalized = models.CharField(
+        max_length=NAME_LENGTH, db_index=True, editable=False
+    )
     year = models.IntegerField(
         'Год выпуска',
         validators=[validate_year]
@@ -56,20 +113,117 @@ class Title(models.Model):
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL, null=True, related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок', default=0, editable=False
+    )
+    review_count = models.PositiveIntegerField(
+        'Количество отзывов', default=0, editable=False
+    )
+    rating = models.PositiveSmallIntegerField(
+        'Рейтинг', null=True, blank=True, editable=False
+    )
+    search_document = models.TextField(
+        'Поисковый документ', blank=True, editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('-year', 'name',)
         verbose_name = 'произведение'
         verbose_name_plural = 'Произведения'
+        indexes = (
+            models.Index(
+                fields=('-year', 'name'), name='title_year_name_idx'
+            ),
+            models.Index(
+                fields=('category', '-year', 'name'),
+                name='title_category_year_name_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name[:TEXT_LENGTH]
 
+    def save(self, *args, **kwargs):
+        self.fill_search_fields()
+        super().save(*args, **kwargs)
+
+    def fill_search_fields(self):
+        """Заполняет теневые поля для поиска; bulk_create не вызывает save."""
+        self.name_normalized = normalize_name(self.name)
+        self.search_document = build_search_document(
+            self.name, self.description
+        )
+
+    def set_genres(self, genres):
+        """
+        Заменяет жанры произведения. В отличие от genre.set() разница с
+        текущими жанрами вычисляется по одной выборке, а новые связи
+        пишутся одним bulk_create; подписчики m2m_changed получают
+        те же post_remove и post_add.
+        """
+        type(self).bulk_set_genres({self: genres})
+
+    @classmethod
+    def bulk_set_genres(cls, genres_by_title):
+        """
+        То же для пачки произведений: словарь «произведение - жанры».
+        Одна выборка текущих связей, одно удаление и один bulk_create
+        на всю пачку.
+        """
+        with transaction.atomic():
+            existing = {}
+            for link_id, title_id, genre_id in GenreTitle.objects.filter(
+                title__in=list(genres_by_title)
+            ).values_list('id', 'title_id', 'genre_id'):
+                existing.setdefault(title_id, {})[genre_id] = link_id
+            removed_links = []
+            new_links = []
+            changes = []
+            for title, genres in genres_by_title.items():
+                links = existing.get(title.pk, {})
+                genre_ids = {genre.pk for genre in genres}
+                removed = links.keys() - genre_ids
+                added = genre_ids - links.keys()
+                removed_links.extend(links[genre_id] for genre_id in removed)
+                new_links.extend(
+                    GenreTitle(title=title, genre_id=genre_id)
+                    for genre_id in added
+                )
+                changes.append((title, removed, added))
+            if removed_links:
+                GenreTitle.objects.filter(pk__in=removed_links).delete()
+            if new_links:
+                GenreTitle.objects.bulk_create(new_links)
+            for title, removed, added in changes:
+                if removed:
+                    title._send_genres_changed('post_remove', removed)
+                if added:
+                    title._send_genres_changed('post_add', added)
+                getattr(title, '_prefetched_objects_cache', {}).pop(
+                    'genre', None
+                )
+
+    def _send_genres_changed(self, action, pk_set):
+        m2m_changed.send(
+            sender=GenreTitle, action=action, instance=self, reverse=False,
+            model=Genre, pk_set=pk_set, using=self._state.db
+        )
+
 
 class GenreTitle(models.Model):
     genre = models.ForeignKey(Genre, on_delete=models.CASCADE)
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('genre', 'title'),
+                name='unique_genre_title',
+            ),
+        )
+
     def __str__(self):
         return f'{self.genre} {self.title}'
 
@@ -110,6 +264,11 @@ class Review(models.Model):
         ordering = ('pub_date',)
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = (
+            models.Index(
+                fields=('title', 'pub_date'), name='review_title_pub_date_idx'
+            ),
+        )
         constraints = (
             models.UniqueConstraint(
                 fields=('author', 'title'),
@@ -120,6 +279,24 @@ class Review(models.Model):
     def __str__(self):
         return f'Отзыв от {self.author.username} к {self.title}'
 
+    def save(self, *args, **kwargs):
+        """
+        Отзыв и поправка рейтинга произведения в сигнале post_save
+        записываются в одной транзакции: иначе сбой UPDATE рейтинга после
+        вставки отзыва навсегда рассогласовал бы rating_sum и review_count.
+        Удаление уже выполняется вместе с сигналами в транзакции.
+        """
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Оценка на момент загрузки нужна, чтобы при изменении отзыва
+        # скорректировать рейтинг произведения на разницу оценок.
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
 
 class Comment(models.Model):
     """Модель коммента."""
@@ -143,6 +320,36 @@ class Comment(models.Model):
         ordering = ('pub_date',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = (
+            models.Index(
+                fields=('review', 'pub_date'),
+                name='comment_review_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return f'Комментарий от {self.author.username} к {self.review}'
+
+
+class ImportCheckpoint(models.Model):
+    """Прогресс загрузки CSV-файла командой import_csv."""
+
+    filename = models.CharField('Файл', max_length=NAME_LENGTH, unique=True)
+    source = models.CharField('Путь к файлу', max_length=1024, blank=True)
+    offset = models.PositiveBigIntegerField('Смещение в байтах', default=0)
+    digest = models.CharField(
+        'MD5 загруженной части файла', max_length=32, blank=True
+    )
+    last_id = models.CharField(
+        'Последний первичный ключ', max_length=NAME_LENGTH, blank=True
+    )
+    rows = models.PositiveBigIntegerField('Загружено строк', default=0)
+    done = models.BooleanField('Загружен полностью', default=False)
+    updated_at = models.DateTimeField('Обновлён', auto_now=True)
+
+    class Meta:
+        verbose_name = 'контрольная точка загрузки'
+        verbose_name_plural = 'Контрольные точки загрузки'
+
+    def __str__(self):
+        return f'{self.filename}: {self.rows}'
@@ -0,0 +1,189 @@
+"""
+Подготовка текста произведений к полнотекстовому поиску.
+
+Текст нормализуется (NFKC, casefold, ё -> е), разбивается на слова,
+а русские слова приводятся к основе алгоритмом Snowball для русского
+языка. Этот же конвейер применяется и к документу, и к поисковому запросу,
+поэтому «фильмы» находит «фильм», а «Крёстный» - «крестного».
+"""
+import re
+import unicodedata
+
+WORD_RE = re.compile(r'[^\W_]+')
+CYRILLIC_RE = re.compile(r'[а-я]')
+
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    (),
+    (
+        'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+        'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+        'ая', 'яя', 'ою', 'ею',
+    ),
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ((), ('ся', 'сь'))
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+        'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+        'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+        'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    (),
+    (
+        'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+        'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+        'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+        'ья', 'я',
+    ),
+)
+SUPERLATIVE = ('ейше', 'ейш')
+DERIVATIONAL = ('ость', 'ост')
+
+
+def normalize(text):
+    """Приводит текст к форме для сравнения без учёта регистра и ё."""
+    return unicodedata.normalize('NFKC', text).casefold().replace('ё', 'е')
+
+
+def normalize_name(text):
+    """Значение теневой колонки для поиска по префиксу имени."""
+    return ' '.join(normalize(text).split())
+
+
+def _region_start(word, start):
+    """Позиция после первой согласной, следующей за гласной."""
+    for position in range(start + 1, len(word)):
+        if word[position] not in VOWELS and word[position - 1] in VOWELS:
+            return position + 1
+    return len(word)
+
+
+def _remove_ending(rv, endings):
+    """
+    Удаляет самое длинное из окончаний. Окончания первой группы
+    допускаются только после «а» или «я», которые не удаляются.
+    Возвращает None, если ни одно окончание не подошло.
+    """
+    after_a, plain = endings
+    longest = max(
+        (ending for ending in after_a + plain if rv.endswith(ending)),
+        key=len,
+        default=None
+    )
+    if longest is None:
+        return None
+    rest = rv[:-len(longest)]
+    if longest in plain or rest.endswith(('а', 'я')):
+        return rest
+    return None
+
+
+def _remove_adjectival(rv):
+    rest = _remove_ending(rv, ADJECTIVE)
+    if rest is None:
+        return None
+    without_participle = _remove_ending(rest, PARTICIPLE)
+    return rest if without_participle is None else without_participle
+
+
+def _remove_word_ending(rv):
+    """
+    Шаг 1: деепричастие либо возвратная частица и затем
+    прилагательное, глагол или существительное.
+    """
+    result = _remove_ending(rv, PERFECTIVE_GERUND)
+    if result is not None:
+        return result
+    without_reflexive = _remove_ending(rv, REFLEXIVE)
+    if without_reflexive is not None:
+        rv = without_reflexive
+    for result in (
+        _remove_adjectival(rv),
+        _remove_ending(rv, VERB),
+        _remove_ending(rv, NOUN),
+    ):
+        if result is not None:
+            return result
+    return rv
+
+
+def _tidy_up(rv):
+    """Шаг 4: превосходная степень, двойное «н» и мягкий знак."""
+    if rv.endswith('нн'):
+        return rv[:-1]
+    for ending in SUPERLATIVE:
+        if rv.endswith(ending):
+            rv = rv[:-len(ending)]
+            return rv[:-1] if rv.endswith('нн') else rv
+    return rv[:-1] if rv.endswith('ь') else rv
+
+
+def stem(word):
+    """Основа русского слова по алгоритму Snowball."""
+    word = normalize(word)
+    rv_start = next(
+        (position + 1 for position, letter in enumerate(word)
+         if letter in VOWELS),
+        None
+    )
+    if rv_start is None:
+        return word
+    r2_start = _region_start(word, _region_start(word, 0))
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    rv = _remove_word_ending(rv)
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    # Шаг 3: словообразовательный суффикс, целиком лежащий в R2.
+    for ending in DERIVATIONAL:
+        if (
+            rv.endswith(ending)
+            and rv_start + len(rv) - len(ending) >= r2_start
+        ):
+            rv = rv[:-len(ending)]
+            break
+    return prefix + _tidy_up(rv)
+
+
+def tokenize(text):
+    """Нормализованные слова текста, русские слова - в виде основ."""
+    return [
+        stem(word) if CYRILLIC_RE.search(word) else word
+        for word in WORD_RE.findall(normalize(text))
+    ]
+
+
+def build_search_document(name, description=''):
+    """
+    Поисковый документ произведения. Основы из названия повторяются
+    дважды, чтобы совпадение в названии весило больше, чем в описании.
+    """
+    name_tokens = ' '.join(tokenize(name))
+    return ' '.join(
+        part for part in (name_tokens, name_tokens, ' '.join(
+            tokenize(description or '')
+        )) if part
+    )
+
+
+def build_match_query(query):
+    """
+    Выражение FTS5 MATCH: все основы запроса должны встретиться
+    в документе, каждая - как префикс слова.
+    """
+    return ' '.join(f'"{token}"*' for token in tokenize(query))
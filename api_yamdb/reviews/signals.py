@@ -0,0 +1,33 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.fts import ensure_fts_triggers
+from reviews.models import Review, Title
+
+
+@receiver(post_save, sender=Review)
+def update_title_rating_on_save(sender, instance, created, **kwargs):
+    """Учитывает новый отзыв или изменённую оценку в рейтинге произведения."""
+    titles = Title.objects.filter(pk=instance.title_id)
+    loaded_score = getattr(instance, '_loaded_score', None)
+    if created:
+        titles.apply_review_delta(instance.score, 1)
+    elif loaded_score is None:
+        titles.recalculate_rating()
+    elif loaded_score != instance.score:
+        titles.apply_review_delta(instance.score - loaded_score, 0)
+    instance._loaded_score = instance.score
+
+
+@receiver(post_delete, sender=Review)
+def update_title_rating_on_delete(sender, instance, **kwargs):
+    """Исключает удалённый отзыв, в том числе каскадно, из рейтинга."""
+    Title.objects.filter(pk=instance.title_id).apply_review_delta(
+        -instance.score, -1
+    )
+
+
+def restore_fts_triggers(sender, using, **kwargs):
+    """Пересоздание таблицы в миграции удаляет триггеры индекса FTS5."""
+    ensure_fts_triggers(connections[using])
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from users.models import MdbUser
+from users.models import MdbUser, OutboxEmail, TokenRevocation
 
 
 @admin.register(MdbUser)
@@ -21,3 +21,20 @@ class MdbUserAdmin(UserAdmin):
                        'user_permissions')}),
         ('Важные даты', {'fields': ('last_login', 'date_joined')}),
     )
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+
+    list_display = ('subject', 'to', 'status', 'attempts', 'next_attempt_at',
+                    'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to',)
+
+
+@admin.register(TokenRevocation)
+class TokenRevocationAdmin(admin.ModelAdmin):
+
+    list_display = ('user_id', 'jti', 'issued_before', 'expires_at',
+                    'created_at')
+    search_fields = ('user_id', 'jti')
@@ -0,0 +1,179 @@
+"""
+Фильтр Блума занятых юзернеймов и емейлов. Отрицательный ответ фильтра
+точен: значения нет в базе (с оговоркой ниже), и регистрации не нужно
+обращаться к базе. Положительный ответ означает «возможно, занято» и
+проверяется запросом.
+
+Фильтр заполняется из базы при первом обращении и пополняется
+post_save пользователя. Пользователей, созданных другими процессами или
+в обход post_save (bulk_create, import_csv), процесс находит сам: раз
+в USER_BLOOM_POLL_INTERVAL секунд он читает отметку таблицы - наибольший
+id и число записей - и при её смене добавляет в фильтр пользователей
+с id больше известного. Полностью фильтр перестраивается раз
+в USER_BLOOM_REBUILD_INTERVAL секунд или при переполнении, что убирает
+удалённые и изменённые значения. Смена юзернейма или емейла в другом
+процессе видна только после перестроения, поэтому код, который
+полагается на отрицательный ответ, должен быть готов к IntegrityError
+при вставке.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Max
+
+USERNAME_PREFIX = 'username:'
+EMAIL_PREFIX = 'email:'
+
+
+class BloomFilter:
+    """Битовый массив и k хэш-функций, полученных двойным хэшированием."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def get_positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return (
+            (first + index * second) % self.size
+            for index in range(self.hash_count)
+        )
+
+    def add(self, value):
+        for position in self.get_positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.get_positions(value)
+        )
+
+
+class UserIndex:
+    """Фильтр Блума юзернеймов и емейлов пользователей."""
+
+    def __init__(self):
+        self._filter = None
+        self._built_at = 0
+        self._count = self._capacity = 0
+        self._last_id = 0
+        self._watermark = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+
+    @staticmethod
+    def get_watermark():
+        """Отметка таблицы пользователей: наибольший id и число записей."""
+        watermark = get_user_model().objects.aggregate(
+            last_id=Max('id'), count=Count('id')
+        )
+        return watermark['last_id'], watermark['count']
+
+    @staticmethod
+    def fill(bloom, rows):
+        """
+        Добавляет строки (id, username, email). Возвращает их число
+        и наибольший id.
+        """
+        count = last_id = 0
+        for user_id, username, email in rows.iterator():
+            bloom.add(USERNAME_PREFIX + username)
+            bloom.add(EMAIL_PREFIX + email)
+            last_id = max(last_id, user_id)
+            count += 1
+        return count, last_id
+
+    def rebuild(self):
+        User = get_user_model()
+        watermark = self.get_watermark()
+        rows = User.objects.values_list('id', 'username', 'email')
+        capacity = max(settings.USER_BLOOM_CAPACITY, watermark[1] * 2)
+        # На каждого пользователя в фильтре два значения.
+        bloom = BloomFilter(capacity * 2, settings.USER_BLOOM_ERROR_RATE)
+        count, last_id = self.fill(bloom, rows)
+        with self._lock:
+            self._filter = bloom
+            self._count = count
+            self._last_id = last_id
+            self._capacity = capacity
+            self._watermark = watermark
+            self._built_at = self._checked_at = time.monotonic()
+        return bloom
+
+    def is_fresh(self, now):
+        return (
+            self._checked_at is not None
+            and now - self._checked_at < settings.USER_BLOOM_POLL_INTERVAL
+        )
+
+    def catch_up(self):
+        """Добавляет пользователей, созданных с прошлой сверки отметки."""
+        now = time.monotonic()
+        if self.is_fresh(now):
+            return
+        watermark = self.get_watermark()
+        with self._lock:
+            if self._filter is not None and watermark != self._watermark:
+                count, last_id = self.fill(
+                    self._filter,
+                    get_user_model().objects.filter(
+                        id__gt=self._last_id
+                    ).values_list('id', 'username', 'email')
+                )
+                self._count += count
+                self._last_id = max(self._last_id, last_id)
+            self._watermark = watermark
+            self._checked_at = now
+
+    def get_filter(self):
+        bloom = self._filter
+        if (
+            bloom is None
+            or time.monotonic() - self._built_at
+            > settings.USER_BLOOM_REBUILD_INTERVAL
+            or self._count > self._capacity
+        ):
+            return self.rebuild()
+        self.catch_up()
+        return self._filter
+
+    def add(self, user):
+        with self._lock:
+            if self._filter is None:
+                return
+            self._filter.add(USERNAME_PREFIX + user.username)
+            self._filter.add(EMAIL_PREFIX + user.email)
+            self._count += 1
+
+    def may_have_username(self, username):
+        return USERNAME_PREFIX + username in self.get_filter()
+
+    def may_have_email(self, email):
+        return EMAIL_PREFIX + email in self.get_filter()
+
+    def is_username_taken(self, username):
+        """Точный ответ: база проверяется только при срабатывании фильтра."""
+        return self.may_have_username(username) and get_user_model(
+        ).objects.filter(username=username).exists()
+
+    def is_email_taken(self, email):
+        return self.may_have_email(email) and get_user_model(
+        ).objects.filter(email=email).exists()
+
+
+user_index = UserIndex()
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.outbox import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_MAX_ATTEMPTS,
+    deliver_pending,
+)
+
+
+class Command(BaseCommand):
+    help = 'Deliver pending emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Number of emails sent over one SMTP connection'
+        )
+        parser.add_argument(
+            '--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS,
+            help='Attempts before an email is marked as failed'
+        )
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting when it is empty'
+        )
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds to wait between polls in --loop mode'
+        )
+
+    def handle(self, *args, **kwargs):
+        total_sent = total = 0
+        while True:
+            sent, processed = deliver_pending(
+                kwargs['batch_size'], kwargs['max_attempts']
+            )
+            total_sent += sent
+            total += processed
+            if processed:
+                continue
+            if not kwargs['loop']:
+                break
+            time.sleep(kwargs['interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Sent {total_sent} of {total} processed emails'
+        ))
@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-18 20:05
+
+from django.db import migrations, models
+
+from reviews.search import normalize_name
+
+
+def fill_normalized_usernames(apps, schema_editor):
+    MdbUser = apps.get_model('users', 'MdbUser')
+    users = list(MdbUser.objects.only('username'))
+    for user in users:
+        user.username_normalized = normalize_name(user.username)
+    MdbUser.objects.bulk_update(
+        users, ('username_normalized',), batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_auto_20240615_1237'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mdbuser',
+            name='username_normalized',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            fill_normalized_usernames, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_mdbuser_username_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mdbuser',
+            name='token_version',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Версия токенов'
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-18 20:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.PositiveIntegerField(db_index=True, verbose_name='Пользователь')),
+                ('jti', models.CharField(blank=True, max_length=255, verbose_name='Идентификатор токена')),
+                ('issued_before', models.DateTimeField(blank=True, null=True, verbose_name='Выданы раньше')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Действует до')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+            ],
+            options={
+                'verbose_name': 'отзыв токенов',
+                'verbose_name_plural': 'Отозванные токены',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -1,16 +1,40 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
+from reviews.search import normalize_name
 from users.validators import validate_username
 from users.constants import FIRST_NAME_MAX_LENGTH, USERNAME_MAX_LENGTH
 
 
-class MdbUser(AbstractUser):
+class UserRoles(models.TextChoices):
+    USER = 'user', 'Пользователь'
+    MODERATOR = 'moderator', 'Модератор'
+    ADMIN = 'admin', 'Администратор'
 
-    class UserRoles(models.TextChoices):
-        USER = 'user', 'Пользователь'
-        MODERATOR = 'moderator', 'Модератор'
-        ADMIN = 'admin', 'Администратор'
+
+class UserRolesMixin:
+    """
+    Проверки роли. Общие для модели пользователя и для пользователя,
+    восстановленного из claims JWT-токена.
+    """
+
+    @property
+    def is_admin(self):
+        return (self.role == UserRoles.ADMIN
+                or self.is_staff
+                or self.is_superuser)
+
+    @property
+    def is_moderator(self):
+        return self.role == UserRoles.MODERATOR
+
+
+class MdbUser(UserRolesMixin, AbstractUser):
+
+    UserRoles = UserRoles
+    # Поля, попадающие в токен: их изменение отзывает выданные токены.
+    TOKEN_CLAIM_FIELDS = ('role', 'is_staff', 'is_superuser', 'is_active')
 
     email = models.EmailField('Емейл', unique=True)
     username = models.CharField(
@@ -22,6 +46,9 @@ class MdbUser(AbstractUser):
             'unique': 'Пользователь с таким юзернеймом уже существует.',
         },
     )
+    username_normalized = models.CharField(
+        max_length=USERNAME_MAX_LENGTH, db_index=True, editable=False
+    )
     first_name = models.CharField(
         'Имя',
         max_length=FIRST_NAME_MAX_LENGTH,
@@ -32,18 +59,113 @@ class MdbUser(AbstractUser):
         max_length=max([len(choice[0]) for choice in UserRoles.choices]),
         choices=UserRoles.choices,
         default=UserRoles.USER)
+    token_version = models.PositiveIntegerField(
+        'Версия токенов', default=0, editable=False
+    )
 
     class Meta:
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('username',)
 
-    @property
-    def is_admin(self):
-        return (self.role == self.UserRoles.ADMIN
-                or self.is_staff
-                or self.is_superuser)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.TOKEN_CLAIM_FIELDS).issubset(field_names):
+            instance._loaded_claims = instance.get_claim_values()
+        return instance
 
-    @property
-    def is_moderator(self):
-        return self.role == self.UserRoles.MODERATOR
+    def get_claim_values(self):
+        return tuple(
+            getattr(self, field) for field in self.TOKEN_CLAIM_FIELDS
+        )
+
+    def claims_changed(self):
+        """Изменились ли поля токена с момента загрузки из базы."""
+        loaded_claims = getattr(self, '_loaded_claims', None)
+        return (
+            loaded_claims is not None
+            and loaded_claims != self.get_claim_values()
+        )
+
+    def save(self, *args, **kwargs):
+        self.fill_search_fields()
+        if self.claims_changed():
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'token_version'
+                }
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.get_claim_values()
+
+    def fill_search_fields(self):
+        """Заполняет теневые поля для поиска; bulk_create не вызывает save."""
+        self.username_normalized = normalize_name(self.username)
+
+
+class OutboxEmail(models.Model):
+    """Письмо, ожидающее отправки командой send_outbox."""
+
+    class Statuses(models.TextChoices):
+        PENDING = 'pending', 'Ожидает отправки'
+        SENDING = 'sending', 'Отправляется'
+        SENT = 'sent', 'Отправлено'
+        FAILED = 'failed', 'Не отправлено'
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель')
+    to = models.EmailField('Получатель')
+    status = models.CharField(
+        'Статус',
+        max_length=max(len(choice[0]) for choice in Statuses.choices),
+        choices=Statuses.choices,
+        default=Statuses.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка', default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('next_attempt_at',)
+        verbose_name = 'письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbox_status_next_attempt_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to}'
+
+
+class TokenRevocation(models.Model):
+    """
+    Отзыв токенов: одного токена по jti или всех токенов пользователя,
+    выданных раньше issued_before. Запись нужна, пока отозванные токены
+    не истекли, после expires_at её можно удалить.
+    """
+
+    user_id = models.PositiveIntegerField('Пользователь', db_index=True)
+    jti = models.CharField('Идентификатор токена', max_length=255,
+                           blank=True)
+    issued_before = models.DateTimeField(
+        'Выданы раньше', null=True, blank=True
+    )
+    expires_at = models.DateTimeField('Действует до', db_index=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = 'отзыв токенов'
+        verbose_name_plural = 'Отозванные токены'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.jti or self.issued_before}'
@@ -0,0 +1,154 @@
+"""
+Исходящие письма. Письмо записывается в таблицу OutboxEmail в той же
+транзакции, что и изменения, ради которых оно отправляется, а доставляет
+его команда send_outbox. Так запрос к API не ждёт SMTP-сервер, а письмо
+не теряется и не уходит при откате транзакции.
+
+Отправка идёт в три шага, и SMTP-сервер не держит открытой транзакцию:
+пачка писем забирается в короткой транзакции (статус SENDING и аренда
+до next_attempt_at), отправляется вне транзакции, а результаты
+записываются второй короткой транзакцией. Письма, аренда которых истекла
+(обработчик упал посреди отправки), забираются снова.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import OutboxEmail
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(minutes=1)
+MAX_RETRY_DELAY = timedelta(hours=6)
+# Сколько письмо остаётся за обработчиком, который его забрал.
+LEASE_DURATION = timedelta(minutes=10)
+
+
+def enqueue_email(subject, body, to, from_email=None):
+    """
+    Ставит письмо в очередь. При EMAIL_OUTBOX_EAGER письмо отправляется
+    сразу после фиксации транзакции (для разработки и тестов).
+    """
+    email = OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        to=to,
+    )
+    if settings.EMAIL_OUTBOX_EAGER:
+        transaction.on_commit(lambda: deliver_pending(ids=[email.pk]))
+    return email
+
+
+def get_retry_delay(attempts):
+    """Экспоненциальная задержка перед следующей попыткой."""
+    return min(RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def mark_failed(email, error, max_attempts, now):
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= max_attempts:
+        email.status = OutboxEmail.Statuses.FAILED
+    else:
+        email.status = OutboxEmail.Statuses.PENDING
+        email.next_attempt_at = now + get_retry_delay(email.attempts)
+
+
+def deliver(emails, max_attempts):
+    """
+    Отправляет письма через одно SMTP-соединение и отмечает в объектах
+    результат каждой отправки. Возвращает число отправленных.
+    """
+    now = timezone.now()
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            mark_failed(email, error, max_attempts, now)
+        return 0
+    sent = 0
+    try:
+        for email in emails:
+            try:
+                EmailMessage(
+                    email.subject, email.body, email.from_email, [email.to],
+                    connection=connection
+                ).send()
+            except Exception as error:
+                mark_failed(email, error, max_attempts, now)
+                continue
+            email.status = OutboxEmail.Statuses.SENT
+            email.sent_at = now
+            sent += 1
+    finally:
+        connection.close()
+    return sent
+
+
+def claim_pending(batch_size, ids=None):
+    """
+    Забирает пачку писем, срок попытки которых наступил: переводит их
+    в SENDING, продлевает аренду и засчитывает попытку. Строки блокируются
+    только на время этой транзакции (на PostgreSQL параллельные
+    обработчики пропускают их). Возвращает письма и срок аренды.
+    """
+    now = timezone.now()
+    leased_until = now + LEASE_DURATION
+    with transaction.atomic():
+        queryset = OutboxEmail.objects.select_for_update(
+            skip_locked=True
+        ).filter(
+            status__in=(
+                OutboxEmail.Statuses.PENDING, OutboxEmail.Statuses.SENDING
+            ),
+            next_attempt_at__lte=now,
+        )
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        emails = list(queryset[:batch_size])
+        for email in emails:
+            email.status = OutboxEmail.Statuses.SENDING
+            email.next_attempt_at = leased_until
+            email.attempts += 1
+        OutboxEmail.objects.bulk_update(
+            emails, ('status', 'next_attempt_at', 'attempts')
+        )
+    return emails, leased_until
+
+
+def save_results(emails, leased_until):
+    """
+    Записывает результаты отправки. Письма, аренда которых истекла и
+    которые уже забрал другой обработчик, не перезаписываются.
+    """
+    with transaction.atomic():
+        leased = set(
+            OutboxEmail.objects.select_for_update().filter(
+                pk__in=[email.pk for email in emails],
+                status=OutboxEmail.Statuses.SENDING,
+                next_attempt_at=leased_until,
+            ).values_list('pk', flat=True)
+        )
+        OutboxEmail.objects.bulk_update(
+            [email for email in emails if email.pk in leased],
+            ('status', 'next_attempt_at', 'last_error', 'sent_at')
+        )
+
+
+def deliver_pending(batch_size=DEFAULT_BATCH_SIZE,
+                    max_attempts=DEFAULT_MAX_ATTEMPTS, ids=None):
+    """
+    Отправляет одну пачку писем, срок попытки которых наступил: забирает
+    её, отправляет вне транзакции и записывает результаты одним
+    bulk_update. Возвращает пару (отправлено, обработано).
+    """
+    emails, leased_until = claim_pending(batch_size, ids)
+    if not emails:
+        return 0, 0
+    sent = deliver(emails, max_attempts)
+    save_results(emails, leased_until)
+    return sent, len(emails)
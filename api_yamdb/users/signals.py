@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from users.bloom import user_index
+from users.models import MdbUser
+
+
+@receiver(post_save, sender=MdbUser)
+def add_user_to_index(sender, instance, **kwargs):
+    """Новые юзернейм и емейл сразу попадают в фильтр Блума."""
+    user_index.add(instance)
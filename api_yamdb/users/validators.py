@@ -2,10 +2,14 @@ import re
 from django.core.exceptions import ValidationError
 
 
+# Имена, занятые адресами users/me/ и users/bulk/.
+RESERVED_USERNAMES = ('me', 'bulk')
+
+
 def validate_username(value):
-    if value.lower() == "me":
+    if value.lower() in RESERVED_USERNAMES:
         raise ValidationError(
-            "Вы не можете выбрать юзернейм 'me', "
+            f"Вы не можете выбрать юзернейм '{value.lower()}', "
             "выберите другой юзернейм.")
 
     pattern = r'^[\w.@+-]+\Z'
@@ -1,6 +1,10 @@
 import os
 import sys
 
+import pytest
+from django.conf import settings
+from django.core.cache import caches
+from django.test import override_settings
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +37,48 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_caches(tmp_path_factory):
+    """
+    Тесты работают со своими каталогами кэша, а не с общими для
+    запущенного сервера разработки.
+    """
+    with override_settings(CACHES={
+        alias: {**options, 'LOCATION': str(tmp_path_factory.mktemp(alias))}
+        for alias, options in settings.CACHES.items()
+    }):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Ответы, версии, токены, отзывы токенов, корзины throttling и фильтр
+    пользователей не должны переживать очистку базы.
+    """
+    from api.authentication import verified_tokens
+    from api.revocation import revoked_tokens
+    from api.throttling import memory_store
+    from users.bloom import user_index
+
+    for cache in caches.all():
+        cache.clear()
+    verified_tokens.clear()
+    memory_store.clear()
+    user_index.reset()
+    revoked_tokens.reset()
+    yield
+    for cache in caches.all():
+        cache.clear()
+    verified_tokens.clear()
+    memory_store.clear()
+    user_index.reset()
+    revoked_tokens.reset()
+
+
+@pytest.fixture(autouse=True)
+def eager_email_outbox(settings):
+    """Письма из очереди уходят сразу, чтобы их было видно в mail.outbox."""
+    settings.EMAIL_OUTBOX_EAGER = True
@@ -0,0 +1,98 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import OperationalError
+
+from reviews.models import Review, Title, TitleQuerySet
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_review_changes(self, client, admin_client,
+                                              admin, user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+        assert self.get_rating(client, title_id) == 5, (
+            'Проверьте, что рейтинг произведения учитывает новые отзывы.'
+        )
+
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[1]['id']
+            ),
+            data={'score': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(client, title_id) == 7, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки в отзыве.'
+        )
+
+        response = admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 10, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+    def test_02_rating_after_author_deleted(self, client, admin_client,
+                                            admin, user, user_client):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 5
+
+        response = admin_client.delete(f'/api/v1/users/{admin.username}/')
+        assert self.get_rating(client, title_id) is None, (
+            'Проверьте, что после каскадного удаления всех отзывов '
+            'рейтинг произведения становится `None`.'
+        )
+
+    def test_03_review_rolled_back_with_rating(self, user, admin,
+                                               monkeypatch):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=admin, text='Отзыв', score=4
+        )
+
+        def fail(*args, **kwargs):
+            raise OperationalError('database is locked')
+
+        monkeypatch.setattr(TitleQuerySet, 'apply_review_delta', fail)
+        with pytest.raises(OperationalError):
+            Review.objects.create(
+                title=title, author=user, text='Отзыв', score=10
+            )
+        review.score = 8
+        with pytest.raises(OperationalError):
+            review.save()
+        with pytest.raises(OperationalError):
+            review.delete()
+        assert list(Review.objects.values_list('score', flat=True)) == [4], (
+            'Проверьте, что отзыв не сохраняется и не удаляется, если '
+            'рейтинг произведения не удалось обновить.'
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.review_count) == (4, 1)
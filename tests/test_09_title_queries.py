@@ -0,0 +1,107 @@
+from http import HTTPStatus
+
+import pytest
+
+from api.revocation import revoked_tokens
+from reviews.models import Category, Genre, Title
+
+
+def create_catalog(size):
+    categories = [
+        Category.objects.create(name=f'Категория {idx}', slug=f'cat-{idx}')
+        for idx in range(2)
+    ]
+    genres = [
+        Genre.objects.create(name=f'Жанр {idx}', slug=f'genre-{idx}')
+        for idx in range(3)
+    ]
+    titles = []
+    for idx in range(size):
+        title = Title.objects.create(
+            name=f'Произведение {idx}',
+            year=2000 + idx,
+            category=categories[idx % len(categories)]
+        )
+        title.genre.set(genres[:idx % len(genres) + 1])
+        titles.append(title)
+    return titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    @pytest.mark.parametrize('size', (1, 5))
+    def test_01_list_query_count(self, client, django_assert_num_queries,
+                                 size):
+        create_catalog(size)
+        # COUNT для пагинации, произведения с категориями и жанры.
+        with django_assert_num_queries(3):
+            response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['results']) == size
+
+    def test_02_detail_query_count(self, client, django_assert_num_queries):
+        titles = create_catalog(3)
+        with django_assert_num_queries(2):
+            response = client.get(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[2].id)
+            )
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['category'] == {'name': 'Категория 0', 'slug': 'cat-0'}
+        assert [genre['slug'] for genre in data['genre']] == [
+            'genre-0', 'genre-1', 'genre-2'
+        ]
+
+    @pytest.mark.parametrize('size', (1, 3))
+    def test_03_create_query_count(self, admin_client, admin,
+                                   django_assert_num_queries, size):
+        create_catalog(0)
+        data = {
+            'name': 'Новое произведение',
+            'year': 2000,
+            'category': 'cat-0',
+            'genre': [f'genre-{idx}' for idx in range(size)],
+        }
+        # Список отозванных токенов читается процессом один раз.
+        revoked_tokens.refresh()
+        # Число запросов не должно расти с числом жанров.
+        with django_assert_num_queries(9):
+            response = admin_client.post(self.TITLES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert sorted(
+            genre['slug'] for genre in response.json()['genre']
+        ) == data['genre']
+
+    def test_04_missing_genres_are_listed(self, admin_client):
+        create_catalog(0)
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': 'Новое произведение',
+            'year': 2000,
+            'category': 'cat-0',
+            'genre': ['genre-0', 'unknown', 'genre-1', 'other'],
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        message = response.json()['genre'][0]
+        assert 'unknown' in message and 'other' in message, (
+            'Проверьте, что в ошибке перечислены все несуществующие жанры.'
+        )
+        assert not Title.objects.exists()
+
+    def test_05_patch_genres_diff(self, admin_client):
+        title = create_catalog(3)[2]
+        response = admin_client.patch(
+            self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=title.id),
+            data={'genre': ['genre-2', 'genre-0']},
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert sorted(
+            genre['slug'] for genre in response.json()['genre']
+        ) == ['genre-0', 'genre-2']
+        assert sorted(title.genre.values_list('slug', flat=True)) == [
+            'genre-0', 'genre-2'
+        ]
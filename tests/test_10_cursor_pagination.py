@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10CursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def walk(self, client, url):
+        results = []
+        pages = 0
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'В режиме курсора ответ не должен содержать `count`.'
+            )
+            results.extend(data['results'])
+            url = data['next']
+            pages += 1
+        return results, pages, data
+
+    def test_01_titles_cursor_walk(self, client):
+        for idx in range(12):
+            Title.objects.create(name=f'Произведение {idx}', year=2000 + idx % 3)
+        expected = list(
+            Title.objects.order_by('-year', 'name', 'id').values_list(
+                'id', flat=True
+            )
+        )
+
+        results, pages, last_page = self.walk(
+            client, f'{self.TITLES_URL}?pagination=cursor'
+        )
+        assert [title['id'] for title in results] == expected, (
+            f'Проверьте, что обход `{self.TITLES_URL}` по курсору '
+            'возвращает все произведения ровно один раз в порядке '
+            '(-year, name, id).'
+        )
+        assert pages == 3
+
+        response = client.get(last_page['previous'])
+        assert response.status_code == HTTPStatus.OK
+        assert [title['id'] for title in response.json()['results']] == (
+            expected[5:10]
+        )
+
+    def test_02_reviews_cursor_walk(self, client, admin, user, moderator):
+        title = Title.objects.create(name='Произведение', year=2000)
+        for author in (admin, user, moderator):
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+        results, pages, _ = self.walk(
+            client,
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+            + '?pagination=cursor'
+        )
+        assert [review['author'] for review in results] == [
+            admin.username, user.username, moderator.username
+        ]
+        assert pages == 1
+
+    def test_03_invalid_cursor(self, client):
+        response = client.get(f'{self.TITLES_URL}?cursor=broken')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_deep_page_rejected(self, client, settings):
+        settings.PAGINATION_MAX_PAGE_DEPTH = 2
+        for idx in range(12):
+            Title.objects.create(name=f'Произведение {idx}', year=2000)
+        response = client.get(f'{self.TITLES_URL}?page=2')
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(f'{self.TITLES_URL}?page=3')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что страницы глубже PAGINATION_MAX_PAGE_DEPTH '
+            'не отдаются постраничной пагинацией.'
+        )
+        assert 'pagination=cursor' in response.json()['detail']
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+
+from reviews.models import Comment, GenreTitle, Review, Title
+
+# Горячие запросы API: (описание, запрос, допустима ли сортировка
+# во временном B-дереве). Для фильтра по жанру сортировка неизбежна:
+# произведения выбираются через промежуточную таблицу.
+HOT_QUERIES = (
+    (
+        'список произведений',
+        lambda: Title.objects.select_related('category')[:5],
+        False
+    ),
+    (
+        'список произведений по курсору',
+        lambda: Title.objects.filter(year__lt=2000).order_by(
+            '-year', 'name', 'id'
+        )[:6],
+        False
+    ),
+    (
+        'фильтр произведений по категории',
+        lambda: Title.objects.select_related('category').filter(
+            category__slug='films'
+        )[:5],
+        False
+    ),
+    (
+        'фильтр произведений по жанру',
+        lambda: Title.objects.filter(genre__slug='drama')[:5],
+        True
+    ),
+    (
+        'жанры страницы произведений',
+        lambda: GenreTitle.objects.filter(title_id__in=(1, 2)),
+        False
+    ),
+    (
+        'отзывы к произведению',
+        lambda: Review.objects.filter(title_id=1)[:5],
+        False
+    ),
+    (
+        'отзывы к произведению по курсору',
+        lambda: Review.objects.filter(title_id=1).order_by(
+            'pub_date', 'id'
+        )[:6],
+        False
+    ),
+    (
+        'комментарии к отзыву',
+        lambda: Comment.objects.filter(review_id=1)[:5],
+        False
+    ),
+)
+
+
+def explain(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='Проверка планов рассчитана на формат EXPLAIN QUERY PLAN SQLite.'
+)
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'description,get_queryset,allow_temp_sort', HOT_QUERIES
+)
+def test_hot_query_plans(description, get_queryset, allow_temp_sort):
+    plan = explain(get_queryset())
+    full_scans = [
+        step for step in plan
+        if step.startswith('SCAN') and 'USING' not in step
+    ]
+    assert not full_scans, (
+        f'Запрос "{description}" выполняется полным сканированием таблицы: '
+        f'{plan}. Проверьте индексы в reviews.models.'
+    )
+    if not allow_temp_sort:
+        assert not any('TEMP B-TREE' in step for step in plan), (
+            f'Запрос "{description}" сортируется во временном B-дереве: '
+            f'{plan}. Проверьте, что порядок выдачи совпадает с индексом.'
+        )
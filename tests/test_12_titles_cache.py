@@ -0,0 +1,102 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import transaction
+
+from api.cache import get_stats, get_versions
+from api.checks import check_shared_cache
+from reviews.models import Category, Genre, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12TitlesCache:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_anonymous_list_is_cached(self, client,
+                                         django_assert_num_queries):
+        Title.objects.create(name='Произведение', year=2000)
+        url = f'{self.TITLES_URL}?year=2000&name=Произведение'
+        first = client.get(url)
+        assert first.status_code == HTTPStatus.OK
+
+        with django_assert_num_queries(0):
+            second = client.get(f'{self.TITLES_URL}?name=Произведение&year=2000')
+        assert second.json() == first.json(), (
+            'Проверьте, что ответ берётся из кэша независимо от порядка '
+            'параметров запроса.'
+        )
+        assert get_stats('titles') == {'hits': 1, 'misses': 1}
+
+    def test_02_writes_invalidate_cache(self, client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        assert client.get(self.TITLES_URL).json()['results'][0][
+            'rating'
+        ] is None
+
+        Review.objects.create(title=title, author=user, text='Отзыв', score=8)
+        assert client.get(self.TITLES_URL).json()['results'][0][
+            'rating'
+        ] == 8, 'Новый отзыв должен сбрасывать кэш списка произведений.'
+
+        title.category = Category.objects.create(name='Фильм', slug='films')
+        title.save()
+        result = client.get(self.TITLES_URL).json()['results'][0]
+        assert result['category'] == {'name': 'Фильм', 'slug': 'films'}
+
+        Category.objects.filter(slug='films').delete()
+        Category.objects.create(name='Фильм', slug='films')
+        result = client.get(self.TITLES_URL).json()['results'][0]
+        assert result['category'] == {'name': '', 'slug': ''}
+        assert get_stats('titles') == {'hits': 0, 'misses': 4}
+
+    def test_03_process_local_cache_rejected(self, settings):
+        assert check_shared_cache(None) == []
+        settings.CACHES = {**settings.CACHES, 'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}
+        assert [error.id for error in check_shared_cache(None)] == [
+            'api.E001'
+        ], 'Проверьте, что кэш в памяти процесса отклоняется проверкой.'
+
+    def test_04_versions_bumped_after_commit(self):
+        versions = get_versions(Title, Genre)
+        with transaction.atomic():
+            title = Title.objects.create(name='Произведение', year=2000)
+            title.set_genres([Genre.objects.create(name='Жанр', slug='g')])
+            assert get_versions(Title, Genre) == versions, (
+                'Проверьте, что версии меняются только после фиксации '
+                'транзакции.'
+            )
+        committed = get_versions(Title, Genre)
+        assert all(new > old for new, old in zip(committed, versions))
+
+        with pytest.raises(ValueError):
+            with transaction.atomic():
+                Title.objects.create(name='Откат', year=2000)
+                raise ValueError
+        assert get_versions(Title) == committed[:1], (
+            'Откат транзакции не должен менять версии.'
+        )
+        with transaction.atomic():
+            Title.objects.create(name='Другое', year=2000)
+        assert get_versions(Title)[0] > committed[0]
+
+    def test_05_versions_survive_response_culling(self, client, settings):
+        settings.CACHES = {
+            **settings.CACHES,
+            'default': {
+                **settings.CACHES['default'],
+                'OPTIONS': {'MAX_ENTRIES': 5, 'CULL_FREQUENCY': 2},
+            },
+        }
+        Title.objects.create(name='Произведение', year=2000)
+        versions = get_versions(Title, Category, Genre)
+        for year in range(30):
+            client.get(f'{self.TITLES_URL}?year={year}')
+        assert get_versions(Title, Category, Genre) == versions, (
+            'Проверьте, что переполнение кэша ответов не вытесняет версии.'
+        )
+        assert get_stats('titles') == {'hits': 0, 'misses': 30}, (
+            'Проверьте, что переполнение кэша ответов не обнуляет счётчики.'
+        )
@@ -0,0 +1,104 @@
+import time
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+
+from api import cache as api_cache
+from reviews.models import Category, Review, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def test_01_titles_etag(self, client, user, django_assert_num_queries):
+        title = Title.objects.create(name='Произведение', year=2000)
+        response = client.get(self.TITLES_URL)
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{self.TITLES_URL}` '
+            'содержит заголовки `ETag` и `Last-Modified`.'
+        )
+
+        with django_assert_num_queries(0):
+            response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        response = client.get(
+            f'{self.TITLES_URL}?year=2000', HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'ETag должен зависеть от параметров запроса.'
+        )
+
+        Review.objects.create(title=title, author=user, text='Отзыв', score=8)
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.get('ETag') != etag
+
+    def test_02_reviews_etag(self, client, user, moderator):
+        title = Title.objects.create(name='Произведение', year=2000)
+        Review.objects.create(title=title, author=user, text='Отзыв', score=8)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        etag = client.get(url).get('ETag')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        user.username = 'renamed'
+        user.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Смена имени автора должна менять ETag списка отзывов.'
+        )
+
+    def test_03_categories_last_modified(self, client):
+        Category.objects.create(name='Фильм', slug='films')
+        last_modified = client.get(self.CATEGORIES_URL).get('Last-Modified')
+        response = client.get(
+            self.CATEGORIES_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    def test_04_deleted_parent(self, client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        etag = client.get(url).get('ETag')
+        review = Review.objects.create(
+            title=Title.objects.create(name='Другое', year=2000),
+            author=user, text='Отзыв', score=8
+        )
+        comments_url = (
+            f'{self.REVIEWS_URL_TEMPLATE.format(title_id=review.title_id)}'
+            f'{review.id}/comments/'
+        )
+        comments_etag = client.get(comments_url).get('ETag')
+        title.delete()
+        review.delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что для удалённого произведения вместо 304 '
+            'возвращается 404.'
+        )
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_05_write_in_same_second(self, client, monkeypatch):
+        now = time.time_ns()
+        # Все записи и ответы теста приходятся на одну и ту же секунду.
+        monkeypatch.setattr(
+            api_cache, 'time', SimpleNamespace(time_ns=lambda: now)
+        )
+        Title.objects.create(name='Произведение', year=2000)
+        url = f'{self.TITLES_URL}?year=2000'
+        last_modified = client.get(url).get('Last-Modified')
+        Title.objects.create(name='Другое', year=2000)
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что запись в ту же секунду, что и отданный ответ, '
+            'меняет Last-Modified.'
+        )
+        assert response.json()['count'] == 2
@@ -0,0 +1,79 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.fts import fts_enabled
+from reviews.models import Category, Title
+from reviews.search import stem
+
+
+@pytest.mark.parametrize('word,expected', (
+    ('фильмы', 'фильм'),
+    ('Крёстного', 'крестн'),
+    ('программирование', 'программирован'),
+    ('ответственности', 'ответствен'),
+    ('важнейшие', 'важн'),
+    ('улыбнувшись', 'улыбнувш'),
+))
+def test_russian_stemmer(word, expected):
+    assert stem(word) == expected
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def create_titles(self):
+        films = Category.objects.create(name='Фильм', slug='films')
+        books = Category.objects.create(name='Книга', slug='books')
+        Title.objects.create(
+            name='Крёстный отец', year=1972, category=films,
+            description='Сага о семье Корлеоне.'
+        )
+        Title.objects.create(
+            name='Сага о Форсайтах', year=1922, category=books,
+            description='Семейная хроника и история отца.'
+        )
+        Title.objects.create(name='Побег из Шоушенка', year=1994,
+                             category=films)
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_by_word_forms(self, client):
+        self.create_titles()
+        assert self.search(client, 'крестного ОТЕЦ') == ['Крёстный отец'], (
+            f'Проверьте, что поиск на `{self.TITLES_URL}` не зависит от '
+            'регистра, буквы ё и формы слова.'
+        )
+        assert self.search(client, 'шоушенк') == ['Побег из Шоушенка']
+        assert self.search(client, 'терминатор') == []
+
+    def test_02_search_ranks_and_combines_with_filters(self, client):
+        self.create_titles()
+        names = self.search(client, 'сага')
+        assert set(names) == {'Крёстный отец', 'Сага о Форсайтах'}
+        if fts_enabled('default'):
+            assert names[0] == 'Сага о Форсайтах', (
+                'Совпадение в названии должно быть релевантнее совпадения '
+                'в описании.'
+            )
+        response = client.get(
+            self.TITLES_URL, {'search': 'сага', 'category': 'books'}
+        )
+        assert [title['name'] for title in response.json()['results']] == [
+            'Сага о Форсайтах'
+        ]
+
+    def test_03_index_follows_title_changes(self, client):
+        self.create_titles()
+        title = Title.objects.get(name='Побег из Шоушенка')
+        title.name = 'Зелёная миля'
+        title.save()
+        assert self.search(client, 'шоушенк') == []
+        assert self.search(client, 'зеленая') == ['Зелёная миля']
+        title.delete()
+        assert self.search(client, 'зеленая') == []
@@ -0,0 +1,52 @@
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Category, Genre, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15NormalizedSearch:
+
+    def get_names(self, client, url, key='name'):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        return sorted(item[key] for item in response.json()['results'])
+
+    def test_01_category_genre_search_ignores_case(self, client):
+        Category.objects.create(name='Фильм', slug='films')
+        Category.objects.create(name='Фильмы ужасов', slug='horror-films')
+        Category.objects.create(name='Книга', slug='books')
+        Genre.objects.create(name='Ёлочная сказка', slug='tale')
+
+        assert self.get_names(client, '/api/v1/categories/?search=фИЛЬМ') == [
+            'Фильм', 'Фильмы ужасов'
+        ], (
+            'Проверьте, что поиск категорий не зависит от регистра '
+            'кириллических букв.'
+        )
+        assert self.get_names(
+            client, '/api/v1/categories/?search=ФИЛЬМЫ  УЖАСОВ'
+        ) == ['Фильмы ужасов']
+        assert self.get_names(client, '/api/v1/genres/?search=елочная') == [
+            'Ёлочная сказка'
+        ]
+
+    def test_02_title_name_filter(self, client):
+        Title.objects.create(name='Война и мир', year=1869)
+        Title.objects.create(name='Войнушка', year=2000)
+        Title.objects.create(name='Мир', year=2000)
+        assert self.get_names(
+            client, '/api/v1/titles/?name=война и МИР'
+        ) == ['Война и мир']
+        assert self.get_names(client, '/api/v1/titles/?name=ВОЙН') == [
+            'Война и мир', 'Войнушка'
+        ]
+
+    def test_03_users_search(self, admin_client, django_user_model):
+        django_user_model.objects.create_user(
+            username='Иван', email='ivan@yamdb.fake'
+        )
+        assert self.get_names(
+            admin_client, '/api/v1/users/?search=ИВАН', key='username'
+        ) == ['Иван']
@@ -0,0 +1,248 @@
+import csv
+import gzip
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+
+from reviews.management.commands.import_csv import (
+    CSV_FILES,
+    convert_range,
+    get_import_order,
+    read_batches,
+    read_ranges,
+)
+from reviews.management.workers import init_worker
+from reviews.models import (
+    Category,
+    Comment,
+    Genre,
+    GenreTitle,
+    ImportCheckpoint,
+    Review,
+    Title,
+)
+
+DATA_DIR = settings.BASE_DIR / 'static' / 'data'
+
+User = get_user_model()
+
+
+def count_rows(filename, directory=DATA_DIR):
+    with open(directory / filename, newline='', encoding='utf-8') as csvfile:
+        return sum(1 for _ in csv.DictReader(csvfile))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16ImportCsv:
+
+    def test_01_import_order(self):
+        order = get_import_order(list(reversed(list(CSV_FILES))))
+        for before, after in (
+            ('users.csv', 'review.csv'),
+            ('category.csv', 'titles.csv'),
+            ('titles.csv', 'genre_title.csv'),
+            ('genre.csv', 'genre_title.csv'),
+            ('review.csv', 'comments.csv'),
+        ):
+            assert order.index(before) < order.index(after), (
+                f'Файл `{before}` должен загружаться раньше `{after}`.'
+            )
+
+    @pytest.mark.parametrize('workers', (1, 2))
+    def test_02_import_static_data(self, client, workers):
+        call_command(
+            'import_csv', str(DATA_DIR), batch_size=7, workers=workers
+        )
+        for model, filename in (
+            (User, 'users.csv'),
+            (Category, 'category.csv'),
+            (Title, 'titles.csv'),
+            (GenreTitle, 'genre_title.csv'),
+            (Review, 'review.csv'),
+            (Comment, 'comments.csv'),
+        ):
+            assert model.objects.count() == count_rows(filename), (
+                f'Проверьте, что из `{filename}` загружены все строки.'
+            )
+
+        title = Title.objects.get(pk=1)
+        assert title.name_normalized == 'побег из шоушенка'
+        assert title.review_count == title.reviews.count()
+        assert title.rating is not None, (
+            'Проверьте, что после загрузки пересчитывается рейтинг.'
+        )
+        assert not User.objects.filter(username_normalized='').exists()
+
+        response = client.get('/api/v1/titles/?search=шоушенк')
+        assert [item['id'] for item in response.json()['results']] == [1]
+
+    def test_03_resume_after_failure(self, tmp_path):
+        for filename in CSV_FILES:
+            (tmp_path / filename).write_bytes(
+                (DATA_DIR / filename).read_bytes()
+            )
+        reviews = (DATA_DIR / 'review.csv').read_text(encoding='utf-8')
+        head, _, tail = reviews.rpartition(',10,2019-09-24T21:08:21.567Z')
+        (tmp_path / 'review.csv').write_text(
+            f'{head},oops,{tail}', encoding='utf-8'
+        )
+
+        with pytest.raises(ValidationError):
+            call_command('import_csv', str(tmp_path), batch_size=3)
+        checkpoint = ImportCheckpoint.objects.get(filename='review.csv')
+        assert not checkpoint.done
+        assert Review.objects.count() == checkpoint.rows > 0, (
+            'Проверьте, что загруженные до ошибки пачки зафиксированы.'
+        )
+        assert checkpoint.last_id == str(
+            Review.objects.order_by('-pk').first().pk
+        )
+
+        (tmp_path / 'review.csv').write_text(reviews, encoding='utf-8')
+        call_command('import_csv', str(tmp_path), batch_size=3, resume=True)
+        assert Review.objects.count() == count_rows('review.csv'), (
+            'Проверьте, что `--resume` продолжает загрузку с контрольной '
+            'точки.'
+        )
+        assert Comment.objects.count() == count_rows('comments.csv')
+        assert ImportCheckpoint.objects.filter(done=False).count() == 0
+
+    def test_04_upsert(self, tmp_path):
+        for filename in CSV_FILES:
+            (tmp_path / filename).write_bytes(
+                (DATA_DIR / filename).read_bytes()
+            )
+        call_command('import_csv', str(tmp_path))
+        rating = Title.objects.get(pk=1).rating
+
+        titles = (tmp_path / 'titles.csv').read_text(encoding='utf-8')
+        (tmp_path / 'titles.csv').write_text(titles.replace(
+            '1,Побег из Шоушенка,1994,1', '1,Побег из Алькатраса,1979,1'
+        ), encoding='utf-8')
+        genres = (tmp_path / 'genre.csv').read_text(encoding='utf-8')
+        (tmp_path / 'genre.csv').write_text(
+            genres.rstrip('\n') + '\n100,Новый жанр,new-genre\n',
+            encoding='utf-8'
+        )
+        comments = (tmp_path / 'comments.csv').read_text(encoding='utf-8')
+        (tmp_path / 'comments.csv').write_text(
+            comments.rsplit('\n3,', 1)[0] + '\n', encoding='utf-8'
+        )
+
+        out = StringIO()
+        call_command(
+            'import_csv', str(tmp_path), upsert=True, delete=True, stdout=out
+        )
+        output = out.getvalue()
+        assert f'{count_rows("titles.csv") - 1} unchanged' in output
+        assert '1 updated' in output and '1 inserted' in output, (
+            'Проверьте, что в режиме `--upsert` записываются только новые '
+            'и изменённые строки.'
+        )
+        title = Title.objects.get(pk=1)
+        assert (title.name_normalized, title.year) == (
+            'побег из алькатраса', 1979
+        )
+        assert title.rating == rating
+        assert Genre.objects.filter(slug='new-genre').exists()
+        assert Comment.objects.count() == count_rows('comments.csv') - 1
+
+    @pytest.mark.parametrize('compress', (False, True))
+    def test_05_export_round_trip(self, tmp_path, compress):
+        call_command('import_csv', str(DATA_DIR))
+        Title.objects.filter(pk=1).update(
+            description='Описание, "в кавычках"\nв две строки'
+        )
+        export_dir = tmp_path / 'export'
+        call_command('export_csv', str(export_dir), chunk_size=5,
+                     gzip=compress)
+        if compress:
+            for filename in CSV_FILES:
+                with gzip.open(export_dir / f'{filename}.gz') as source:
+                    (export_dir / filename).write_bytes(source.read())
+        for filename in CSV_FILES:
+            assert count_rows(filename) == count_rows(
+                filename, export_dir
+            ), f'Проверьте, что в `{filename}` выгружены все строки.'
+
+        titles = list(
+            Title.objects.values_list('id', 'name_normalized', 'description')
+        )
+        dates = {
+            model: list(
+                model.objects.order_by('pk').values_list('pk', 'pub_date')
+            )
+            for model in (Review, Comment)
+        }
+        assert dates[Review][0][1].year == 2019, (
+            'Проверьте, что при загрузке сохраняется `pub_date` из файла.'
+        )
+        Title.objects.all().delete()
+        User.objects.all().delete()
+        call_command('import_csv', str(export_dir), upsert=True)
+        assert list(
+            Title.objects.values_list('id', 'name_normalized', 'description')
+        ) == titles, (
+            'Проверьте, что выгрузка и загрузка сохраняют описания '
+            'произведений.'
+        )
+        assert Review.objects.count() == count_rows('review.csv')
+        for model, values in dates.items():
+            assert list(
+                model.objects.order_by('pk').values_list('pk', 'pub_date')
+            ) == values, (
+                'Проверьте, что выгрузка и загрузка сохраняют `pub_date`.'
+            )
+
+    def test_06_worker_ranges(self, tmp_path):
+        filepath = tmp_path / 'category.csv'
+        filepath.write_text(
+            'id,name,slug\n1,"Многострочное\n""название""",one\n'
+            '2,Второе,two\n3,Третье,three\n',
+            encoding='utf-8'
+        )
+        ranges = list(read_ranges(filepath, 2))
+        assert [end for _, end in ranges] == [
+            offset for _, offset in read_batches(filepath, 2)
+        ], 'Границы пачек должны совпадать со смещениями read_batches.'
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=context, initializer=init_worker
+        ) as executor:
+            batch = executor.submit(
+                convert_range, 'reviews.category', {}, str(filepath),
+                *ranges[0]
+            ).result()
+        assert [values[1] for values in batch] == [
+            'Многострочное\n"название"', 'Второе'
+        ], 'Проверьте, что обработчик сам читает свою пачку из файла.'
+
+    def test_07_resume_other_dump(self, tmp_path):
+        call_command('import_csv', str(DATA_DIR))
+        for filename in CSV_FILES:
+            (tmp_path / filename).write_bytes(
+                (DATA_DIR / filename).read_bytes()
+            )
+        titles = (tmp_path / 'titles.csv').read_text(encoding='utf-8')
+        (tmp_path / 'titles.csv').write_text(titles.replace(
+            'Побег из Шоушенка', 'Побег из Алькатраса'
+        ), encoding='utf-8')
+        out = StringIO()
+        call_command(
+            'import_csv', str(tmp_path), resume=True, upsert=True, stdout=out
+        )
+        output = out.getvalue()
+        assert 'Skipped genre.csv' in output
+        assert 'Checkpoint of titles.csv was made for another file' in (
+            output
+        ), 'Проверьте, что контрольная точка другой выгрузки сбрасывается.'
+        assert Title.objects.get(pk=1).name == 'Побег из Алькатраса'
+        assert ImportCheckpoint.objects.get(
+            filename='titles.csv'
+        ).source == str(tmp_path / 'titles.csv')
@@ -0,0 +1,81 @@
+import csv
+import json
+from http import HTTPStatus
+
+import pytest
+
+from reviews.models import Comment, Review, Title
+
+
+def read_stream(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Export:
+
+    REVIEWS_URL = '/api/v1/export/reviews/'
+    COMMENTS_URL = '/api/v1/export/comments/'
+
+    @pytest.fixture
+    def reviews(self, user, moderator):
+        titles = [
+            Title.objects.create(name=f'Произведение {idx}', year=2000)
+            for idx in range(2)
+        ]
+        reviews = [
+            Review.objects.create(
+                title=title, author=author, text='Отзыв', score=5
+            )
+            for title in titles for author in (user, moderator)
+        ]
+        for review in reviews:
+            Comment.objects.create(review=review, author=user, text='Коммент')
+        return reviews
+
+    def test_01_only_admin(self, client, user_client, moderator_client):
+        for test_client in (client, user_client, moderator_client):
+            response = test_client.get(self.REVIEWS_URL)
+            assert response.status_code in (
+                HTTPStatus.UNAUTHORIZED, HTTPStatus.FORBIDDEN
+            ), 'Проверьте, что выгрузка отзывов доступна только админу.'
+
+    def test_02_reviews_ndjson(self, admin_client, reviews, user):
+        response = admin_client.get(
+            f'{self.REVIEWS_URL}?title={reviews[0].title_id}'
+            f'&author={user.username}'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming
+        assert response['Content-Type'] == 'application/x-ndjson'
+        rows = [json.loads(line) for line in read_stream(response).splitlines()]
+        assert [row['id'] for row in rows] == [reviews[0].id]
+        assert rows[0]['author'] == user.username
+        assert set(rows[0]) == {
+            'id', 'title_id', 'text', 'author', 'score', 'pub_date'
+        }
+
+    def test_03_comments_csv(self, admin_client, reviews):
+        response = admin_client.get(
+            f'{self.COMMENTS_URL}?output=csv&title={reviews[2].title_id}'
+        )
+        assert response.status_code == HTTPStatus.OK
+        rows = list(csv.DictReader(read_stream(response).splitlines()))
+        assert [int(row['review_id']) for row in rows] == [
+            review.id for review in reviews[2:]
+        ]
+
+    def test_04_pub_date_range_and_errors(self, admin_client, reviews):
+        after = Review.objects.get(pk=reviews[1].pk).pub_date.isoformat()
+        response = admin_client.get(
+            self.REVIEWS_URL, {'pub_date_after': after}
+        )
+        ids = [
+            json.loads(line)['id']
+            for line in read_stream(response).splitlines()
+        ]
+        assert ids == [review.id for review in reviews[1:]]
+
+        for params in ({'output': 'xml'}, {'pub_date_after': 'вчера'}):
+            response = admin_client.get(self.REVIEWS_URL, params)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,90 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from reviews.models import Comment, Review, Title
+from tests.utils import count_selects
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18NestedQueries:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_review_create_loads_title_once(self, user_client):
+        title = Title.objects.create(name='Произведение', year=2000)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                self.REVIEWS_URL_TEMPLATE.format(title_id=title.id),
+                data={'text': 'Отзыв', 'score': 7}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert count_selects(context, 'reviews_title') == 1, (
+            'Проверьте, что произведение загружается один раз за запрос.'
+        )
+
+    def test_02_comment_create_loads_review_once(self, user_client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=7
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                self.COMMENTS_URL_TEMPLATE.format(
+                    title_id=title.id, review_id=review.id
+                ),
+                data={'text': 'Коммент'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert Comment.objects.filter(review=review).count() == 1
+        assert count_selects(context, 'reviews_review') == 1, (
+            'Проверьте, что отзыв загружается один раз за запрос.'
+        )
+
+    @pytest.mark.parametrize('size', (1, 4))
+    def test_03_review_list_query_count(self, client, django_user_model,
+                                        django_assert_num_queries, size):
+        title = Title.objects.create(name='Произведение', year=2000)
+        for idx in range(size):
+            author = django_user_model.objects.create_user(
+                username=f'author{idx}', email=f'author{idx}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title=title, author=author, text='Отзыв', score=7
+            )
+            Comment.objects.create(review=review, author=author, text='Ок')
+        # Произведение, COUNT и страница отзывов вместе с авторами.
+        with django_assert_num_queries(3):
+            response = client.get(
+                self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+            )
+        assert [
+            item['author'] for item in response.json()['results']
+        ] == [f'author{idx}' for idx in range(size)]
+        with django_assert_num_queries(3):
+            response = client.get(self.COMMENTS_URL_TEMPLATE.format(
+                title_id=title.id, review_id=review.id
+            ))
+        assert response.json()['results'][0]['author'] == f'author{size - 1}'
+
+    def test_04_author_permission_skips_user_lookup(self, user_client, user):
+        title = Title.objects.create(name='Произведение', year=2000)
+        review = Review.objects.create(
+            title=title, author=user, text='Отзыв', score=7
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.patch(
+                self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+                + f'{review.id}/',
+                data={'text': 'Новый текст'}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert count_selects(context, 'users_mdbuser') == 1, (
+            'Проверьте, что права автора проверяются по author_id, а автор '
+            'загружается вместе с отзывом.'
+        )
@@ -0,0 +1,114 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import verified_tokens
+from tests.utils import count_selects
+
+
+def get_client(user):
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == HTTPStatus.OK
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+    return client, response.json()['token']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19TokenClaims:
+
+    TITLES_URL = '/api/v1/titles/'
+    ME_URL = '/api/v1/users/me/'
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_token_contains_claims(self, admin):
+        _, token = get_client(admin)
+        claims = AccessToken(token)
+        assert (claims['role'], claims['is_staff'], claims['ver']) == (
+            'admin', False, 0
+        ), 'Проверьте, что токен содержит роль пользователя и версию.'
+
+    def test_02_read_views_skip_user_query(self, admin):
+        client, _ = get_client(admin)
+        client.get(self.TITLES_URL + '?year=1')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert count_selects(context, 'users_mdbuser') == 0, (
+            'Проверьте, что для чтения произведений пользователь берётся '
+            'из claims токена.'
+        )
+        response = client.post(self.TITLES_URL, data={})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что права админа из claims проверяются корректно.'
+        )
+        assert client.get(self.USERS_URL).status_code == HTTPStatus.OK
+
+    def test_03_role_change_revokes_token(self, admin):
+        client, _ = get_client(admin)
+        assert client.get(self.TITLES_URL).status_code == HTTPStatus.OK
+        admin.role = 'user'
+        admin.save()
+        for url in (self.TITLES_URL, self.ME_URL):
+            assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED, (
+                'Проверьте, что после смены роли старый токен отклоняется.'
+            )
+        new_client, _ = get_client(admin)
+        assert new_client.get(self.ME_URL).json()['role'] == 'user'
+
+        admin.bio = 'Новая биография'
+        admin.save()
+        assert new_client.get(self.TITLES_URL).status_code == HTTPStatus.OK
+
+    def test_04_deleted_user_token_rejected(self, user):
+        client, _ = get_client(user)
+        assert client.get(self.TITLES_URL).status_code == HTTPStatus.OK
+        user.delete()
+        assert client.get(
+            self.TITLES_URL
+        ).status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_05_verified_token_cache(self, user, settings):
+        client, token = get_client(user)
+        for _ in range(3):
+            assert client.get(self.TITLES_URL).status_code == HTTPStatus.OK
+        assert verified_tokens.get_stats() == {
+            'hits': 2, 'misses': 1, 'size': 1
+        }, 'Проверьте, что проверенный токен берётся из кэша.'
+
+        settings.JWT_CACHE_SIZE = 1
+        other_client, _ = get_client(user)
+        other_client.get(self.TITLES_URL)
+        assert verified_tokens.get_stats()['size'] == 1
+        assert verified_tokens.get(token) is None, (
+            'Проверьте, что кэш вытесняет давно не использованные токены.'
+        )
+
+        user.role = 'moderator'
+        user.save()
+        assert other_client.get(
+            self.TITLES_URL
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Кэш токенов не должен пропускать отозванные токены.'
+        )
+
+    def test_06_verified_token_stats_command(self, user):
+        client, _ = get_client(user)
+        for _ in range(3):
+            client.get(self.TITLES_URL)
+        verified_tokens.flush_stats()
+        out = StringIO()
+        call_command('cache_stats', 'jwt', stdout=out)
+        assert 'jwt: hits=2 misses=1' in out.getvalue(), (
+            'Проверьте, что cache_stats показывает счётчики кэша JWT.'
+        )
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from users.models import OutboxEmail
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class TransactionCheckingBackend(EmailBackend):
+    in_transaction = []
+
+    def send_messages(self, messages):
+        TransactionCheckingBackend.in_transaction.append(
+            connection.in_atomic_block
+        )
+        return super().send_messages(messages)
+
+
+class FailingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    COUNTING_BACKEND = 'tests.test_20_email_outbox.CountingBackend'
+    FAILING_BACKEND = 'tests.test_20_email_outbox.FailingBackend'
+    CHECKING_BACKEND = (
+        'tests.test_20_email_outbox.TransactionCheckingBackend'
+    )
+
+    @pytest.fixture(autouse=True)
+    def deferred_outbox(self, settings):
+        settings.EMAIL_OUTBOX_EAGER = False
+
+    def signup(self, client, count):
+        for idx in range(count):
+            response = client.post(self.URL_SIGNUP, data={
+                'email': f'user{idx}@yamdb.fake', 'username': f'user{idx}'
+            })
+            assert response.status_code == HTTPStatus.OK
+
+    def test_01_signup_writes_outbox(self, client, settings):
+        self.signup(client, 3)
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что письмо не отправляется в ходе запроса.'
+        )
+        assert OutboxEmail.objects.filter(
+            status=OutboxEmail.Statuses.PENDING
+        ).count() == 3
+
+        settings.EMAIL_BACKEND = self.COUNTING_BACKEND
+        CountingBackend.opened = 0
+        call_command('send_outbox', batch_size=2)
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            f'user{idx}@yamdb.fake' for idx in range(3)
+        ]
+        assert CountingBackend.opened == 2, (
+            'Проверьте, что на пачку писем открывается одно соединение.'
+        )
+        assert not OutboxEmail.objects.exclude(
+            status=OutboxEmail.Statuses.SENT
+        ).exists()
+
+    def test_02_retries_with_backoff(self, client, settings):
+        self.signup(client, 1)
+        settings.EMAIL_BACKEND = self.FAILING_BACKEND
+        call_command('send_outbox', max_attempts=2)
+        email = OutboxEmail.objects.get()
+        assert email.status == OutboxEmail.Statuses.PENDING
+        assert email.attempts == 1
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная попытка откладывается.'
+        )
+        assert 'SMTP недоступен' in email.last_error
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_outbox', max_attempts=2)
+        email.refresh_from_db()
+        assert (email.status, email.attempts) == (
+            OutboxEmail.Statuses.FAILED, 2
+        )
+
+    def test_03_sends_outside_transaction(self, client, settings):
+        self.signup(client, 2)
+        settings.EMAIL_BACKEND = self.CHECKING_BACKEND
+        TransactionCheckingBackend.in_transaction = []
+        call_command('send_outbox')
+        assert TransactionCheckingBackend.in_transaction == [False, False], (
+            'Проверьте, что письма отправляются вне транзакции.'
+        )
+        assert not OutboxEmail.objects.exclude(
+            status=OutboxEmail.Statuses.SENT
+        ).exists()
+
+    def test_04_expired_lease_reclaimed(self, client):
+        self.signup(client, 2)
+        leased, expired = OutboxEmail.objects.all()
+        OutboxEmail.objects.filter(pk=leased.pk).update(
+            status=OutboxEmail.Statuses.SENDING,
+            next_attempt_at=timezone.now() + timedelta(minutes=5)
+        )
+        OutboxEmail.objects.filter(pk=expired.pk).update(
+            status=OutboxEmail.Statuses.SENDING,
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        mail.outbox = []
+        call_command('send_outbox')
+        assert [message.to for message in mail.outbox] == [[expired.to]], (
+            'Проверьте, что письмо с истёкшей арендой отправляется снова, '
+            'а занятое другим обработчиком - нет.'
+        )
+        leased.refresh_from_db()
+        assert leased.status == OutboxEmail.Statuses.SENDING
@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+
+from api.throttling import take_token
+from reviews.models import Title
+
+User = get_user_model()
+
+
+@pytest.fixture
+def rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'signup': '2/min', 'token': '2/min', 'writes': '2/min'
+        },
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21Throttling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def test_01_token_bucket_refill(self):
+        allowed, bucket, wait = take_token(None, 2, 1, now=0)
+        assert allowed and bucket == (1, 0)
+        allowed, bucket, wait = take_token(bucket, 2, 1, now=0)
+        allowed, bucket, wait = take_token(bucket, 2, 1, now=0.5)
+        assert not allowed and wait == pytest.approx(0.5)
+        allowed, bucket, wait = take_token(bucket, 2, 1, now=1)
+        assert allowed, 'Корзина должна пополняться со временем.'
+
+    @pytest.mark.parametrize('store', ('memory', 'cache'))
+    def test_02_signup_by_ip(self, client, rates, settings, store,
+                             django_assert_num_queries):
+        settings.THROTTLE_STORE = store
+        for _ in range(2):
+            client.post(self.URL_SIGNUP, data={})
+        with django_assert_num_queries(0):
+            response = client.post(self.URL_SIGNUP, data={
+                'email': 'valid@yamdb.fake', 'username': 'valid'
+            })
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) > 0, (
+            'Проверьте, что ответ на лишний запрос содержит Retry-After.'
+        )
+        assert not User.objects.exists()
+        response = client.post(
+            self.URL_SIGNUP, data={}, REMOTE_ADDR='10.0.0.2'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_token_by_username(self, client, rates):
+        for _ in range(2):
+            client.post(self.URL_TOKEN, data={'username': 'victim'})
+        response = client.post(self.URL_TOKEN, data={'username': 'victim'})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        response = client.post(self.URL_TOKEN, data={'username': 'other'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Лимит на получение токена должен считаться по юзернейму.'
+        )
+
+    def test_04_writes_by_user(self, user_client, moderator_client, rates):
+        title = Title.objects.create(name='Произведение', year=2000)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        for _ in range(2):
+            user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        response = user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        assert user_client.get(url).status_code == HTTPStatus.OK, (
+            'Чтение не должно ограничиваться лимитом на запись.'
+        )
+        response = moderator_client.post(
+            url, data={'text': 'Отзыв', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+    def test_05_forwarded_for_ignored(self, client, rates):
+        for index in range(3):
+            response = client.post(
+                self.URL_SIGNUP, data={},
+                HTTP_X_FORWARDED_FOR=f'10.0.1.{index}'
+            )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Лимит на IP не должен обходиться подменой X-Forwarded-For.'
+        )
+
+    def test_06_writes_throttled_before_user_load(
+            self, user_client, rates, django_assert_num_queries):
+        url = '/api/v1/titles/0/reviews/'
+        for _ in range(2):
+            user_client.post(url, data={'text': 'Отзыв', 'score': 5})
+        with django_assert_num_queries(0):
+            response = user_client.post(
+                url, data={'text': 'Отзыв', 'score': 5}
+            )
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Лишний запрос на запись должен отклоняться до загрузки '
+            'пользователя из базы.'
+        )
+        forged = APIClient()
+        forged.credentials(HTTP_AUTHORIZATION='Bearer forged')
+        response = forged.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Негодный токен не должен расходовать лимит пользователя.'
+        )
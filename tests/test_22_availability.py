@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import count_selects
+from users.bloom import BloomFilter, user_index
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22Availability:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_AVAILABILITY = '/api/v1/auth/availability/'
+
+    def test_01_bloom_filter(self):
+        bloom = BloomFilter(1000, 0.01)
+        values = [f'user{index}' for index in range(1000)]
+        for value in values:
+            bloom.add(value)
+        assert all(value in bloom for value in values), (
+            'Фильтр Блума не должен давать ложноотрицательных ответов.'
+        )
+        false_positives = sum(
+            f'other{index}' in bloom for index in range(10000)
+        )
+        assert false_positives < 300
+
+    def test_02_signup_skips_user_lookup(self, client):
+        User.objects.create(username='existing', email='existing@yamdb.fake')
+        user_index.rebuild()
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.URL_SIGNUP, data={
+                'email': 'new@yamdb.fake', 'username': 'new'
+            })
+        assert response.status_code == HTTPStatus.OK
+        assert count_selects(context, 'users_mdbuser') == 0, (
+            'Проверьте, что при регистрации нового пользователя свободные '
+            'юзернейм и емейл не ищутся в базе.'
+        )
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'new@yamdb.fake', 'username': 'new'
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Повторный запрос кода должен находить созданного пользователя.'
+        )
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'new@yamdb.fake', 'username': 'existing'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_stale_filter(self, client):
+        user_index.rebuild()
+        # Пользователь создан в обход post_save, как другим процессом.
+        User.objects.bulk_create([
+            User(username='other', email='other@yamdb.fake')
+        ])
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'other@yamdb.fake', 'username': 'other'
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Устаревший фильтр не должен мешать повторному запросу кода.'
+        )
+        assert User.objects.count() == 1
+        assert len(mail.outbox) == 1
+        response = client.post(self.URL_SIGNUP, data={
+            'email': 'another@yamdb.fake', 'username': 'other'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_04_availability(self, client, django_assert_num_queries):
+        User.objects.create(username='taken', email='taken@yamdb.fake')
+        user_index.rebuild()
+        with django_assert_num_queries(0):
+            response = client.get(
+                self.URL_AVAILABILITY, {'username': 'free'}
+            )
+        assert response.json() == {
+            'username': {'value': 'free', 'available': True}
+        }
+        response = client.get(self.URL_AVAILABILITY, {
+            'username': 'taken', 'email': 'free@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {
+            'username': {'value': 'taken', 'available': False},
+            'email': {'value': 'free@yamdb.fake', 'available': True},
+        }
+        response = client.get(self.URL_AVAILABILITY)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_05_availability_with_stale_filter(self, client, settings):
+        settings.USER_BLOOM_POLL_INTERVAL = 0
+        user_index.rebuild()
+        # Пользователь создан в обход post_save, как другим процессом.
+        User.objects.bulk_create([
+            User(username='ghost', email='ghost@yamdb.fake')
+        ])
+        response = client.get(self.URL_AVAILABILITY, {
+            'username': 'ghost', 'email': 'ghost@yamdb.fake'
+        })
+        assert response.json() == {
+            'username': {'value': 'ghost', 'available': False},
+            'email': {'value': 'ghost@yamdb.fake', 'available': False},
+        }, (
+            'Проверьте, что фильтр находит пользователей, созданных '
+            'другими процессами, не дожидаясь перестроения.'
+        )
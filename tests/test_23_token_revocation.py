@@ -0,0 +1,105 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.authentication import get_access_token
+from api.revocation import revoke_token, revoked_tokens
+from tests.utils import count_selects
+from users.models import TokenRevocation
+
+
+def get_client(user):
+    token = get_access_token(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client, token
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23TokenRevocation:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_revoke_single_token(self, user):
+        client, token = get_client(user)
+        other_client, _ = get_client(user)
+        assert client.get(self.TITLES_URL).status_code == HTTPStatus.OK
+        revoke_token(token)
+        response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что отозванный по jti токен отклоняется.'
+        )
+        assert other_client.get(
+            self.TITLES_URL
+        ).status_code == HTTPStatus.OK, (
+            'Отзыв одного токена не должен затрагивать другие токены.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            other_client.get(self.TITLES_URL)
+        assert count_selects(context, 'users_tokenrevocation') == 0, (
+            'Проверьте, что отзывы проверяются по списку в памяти.'
+        )
+
+    def test_02_demoted_user(self, admin_client, moderator):
+        client, _ = get_client(moderator)
+        response = admin_client.patch(
+            f'/api/v1/users/{moderator.username}/', data={'role': 'user'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert client.get(
+            self.TITLES_URL
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что после понижения роли старый токен отклоняется.'
+        )
+        moderator.refresh_from_db()
+        new_client, _ = get_client(moderator)
+        assert new_client.get(self.TITLES_URL).status_code == HTTPStatus.OK
+        assert revoked_tokens.get_stats()['users'] == 1
+
+    def test_03_polling(self, user, settings):
+        settings.TOKEN_REVOCATION_POLL_INTERVAL = 60
+        client, token = get_client(user)
+        assert client.get(self.TITLES_URL).status_code == HTTPStatus.OK
+        # Отзыв, записанный другим процессом.
+        TokenRevocation.objects.create(
+            user_id=user.pk, jti=token['jti'],
+            expires_at=timezone.now() + timedelta(days=1)
+        )
+        assert client.get(self.TITLES_URL).status_code == HTTPStatus.OK
+        settings.TOKEN_REVOCATION_POLL_INTERVAL = 0
+        assert client.get(
+            self.TITLES_URL
+        ).status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что список отзывов перечитывается из базы '
+            'после интервала опроса.'
+        )
+
+    def test_04_expired_revocations_removed(self, user):
+        TokenRevocation.objects.create(
+            user_id=user.pk, jti='expired',
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        _, token = get_client(user)
+        revoke_token(token)
+        assert list(
+            TokenRevocation.objects.values_list('jti', flat=True)
+        ) == [token['jti']]
+        revoked_tokens.refresh()
+        assert revoked_tokens.get_stats()['jtis'] == 1
+
+    def test_05_deleted_revocation_polled(self, user, settings):
+        settings.TOKEN_REVOCATION_POLL_INTERVAL = 0
+        client, token = get_client(user)
+        revoke_token(token)
+        assert client.get(
+            self.TITLES_URL
+        ).status_code == HTTPStatus.UNAUTHORIZED
+        TokenRevocation.objects.all().delete()
+        assert client.get(self.TITLES_URL).status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление отзыва из базы видно после опроса.'
+        )
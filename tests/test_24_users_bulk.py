@@ -0,0 +1,102 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from users.bloom import user_index
+
+User = get_user_model()
+
+
+def get_users(count, prefix='partner'):
+    return [
+        {
+            'username': f'{prefix}{index}',
+            'email': f'{prefix}{index}@yamdb.fake',
+            'role': 'moderator',
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24UsersBulk:
+
+    URL = '/api/v1/users/bulk/'
+
+    def test_01_json_array(self, admin_client, admin):
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                self.URL, data=get_users(1200), format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['created'] == 1200
+        assert User.objects.filter(role='moderator').count() == 1200
+        assert len(context.captured_queries) < 30, (
+            'Проверьте, что пользователи проверяются и создаются пачками, '
+            'а не по одному.'
+        )
+        user = User.objects.get(username='partner7')
+        assert user.username_normalized == 'partner7'
+        assert user_index.is_username_taken('partner7')
+
+    def test_02_ndjson_with_errors(self, admin_client, admin):
+        users = get_users(3)
+        users[1]['username'] = admin.username
+        users[2]['email'] = 'not-an-email'
+        rows = [json.dumps(user) for user in users]
+        rows.append(json.dumps(get_users(4)[3]))
+        rows.append(json.dumps({**get_users(5)[4], 'username': 'partner3'}))
+        rows.append(json.dumps({'username': 'me', 'email': 'me@yamdb.fake'}))
+        response = admin_client.post(
+            self.URL, data='\n'.join(rows) + '\n',
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.MULTI_STATUS
+        results = response.json()['results']
+        assert [result['status'] for result in results] == [
+            'created', 'error', 'error', 'error', 'error', 'error'
+        ], 'Проверьте, что результат возвращается для каждой строки.'
+        assert 'username' in results[1]['errors']
+        assert 'email' in results[2]['errors']
+        assert results[3]['errors'] == results[4]['errors'] == {
+            'username': ['Значение повторяется в запросе.']
+        }
+        assert 'username' in results[5]['errors']
+        assert set(User.objects.values_list('username', flat=True)) == {
+            admin.username, 'partner0'
+        }
+
+    def test_03_bad_requests(self, admin_client, user_client):
+        response = user_client.post(
+            self.URL, data=get_users(1), format='json'
+        )
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.post(
+            self.URL, data=get_users(1)[0], format='json'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = admin_client.post(
+            self.URL, data='{"username": "partner"}\n{oops',
+            content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'Строка 2' in response.json()['detail']
+
+    @pytest.mark.parametrize('username', ('bulk', 'Bulk'))
+    def test_04_bulk_username_reserved(self, client, admin_client, username):
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': username, 'email': 'bulk@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что юзернейм `bulk` занят адресом '
+            f'`{self.URL}` и недоступен при регистрации.'
+        )
+        response = admin_client.post('/api/v1/users/', data={
+            'username': username, 'email': 'bulk@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert not User.objects.filter(username__iexact='bulk').exists()
@@ -0,0 +1,111 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.cache import bump_version, defer_version_bumps, get_versions
+from reviews.models import Category, Genre, GenreTitle, Title
+from tests.utils import count_selects
+
+
+def create_catalog():
+    Category.objects.create(name='Фильм', slug='movie')
+    Category.objects.create(name='Книга', slug='book')
+    for slug in ('drama', 'comedy', 'horror'):
+        Genre.objects.create(name=slug, slug=slug)
+
+
+def get_titles(count):
+    return [
+        {
+            'name': f'Произведение {index}',
+            'year': 1990 + index % 30,
+            'category': 'movie',
+            'genre': ['drama', 'comedy'],
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25TitlesBulk:
+
+    URL = '/api/v1/titles/bulk/'
+
+    def test_01_create(self, admin_client):
+        create_catalog()
+        versions = get_versions(Title, GenreTitle)
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(
+                self.URL, data=get_titles(50), format='json'
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['created'] == 50
+        assert count_selects(context, 'reviews_genre') == 1, (
+            'Проверьте, что жанры всей пачки ищутся одним запросом.'
+        )
+        assert count_selects(context, 'reviews_category') == 1
+        assert GenreTitle.objects.count() == 100
+        new_versions = get_versions(Title, GenreTitle)
+        assert all(new > old for new, old in zip(new_versions, versions))
+        title = Title.objects.get(pk=response.json()['results'][0]['id'])
+        assert title.name_normalized and title.search_document
+        assert admin_client.get(
+            '/api/v1/titles/', {'search': 'произведение'}
+        ).json()['count'] == 50
+
+    def test_02_create_errors(self, admin_client, user_client):
+        create_catalog()
+        titles = get_titles(4)
+        titles[1]['year'] = 3000
+        titles[2]['genre'] = ['drama', 'unknown']
+        titles[3]['category'] = 'missing'
+        response = admin_client.post(self.URL, data=titles, format='json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS
+        results = response.json()['results']
+        assert results[0]['status'] == 'created'
+        assert list(results[1]['errors']) == ['year']
+        assert 'unknown' in results[2]['errors']['genre'][0]
+        assert 'missing' in results[3]['errors']['category'][0]
+        assert Title.objects.count() == 1
+        response = user_client.post(self.URL, data=titles, format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_03_update(self, admin_client):
+        create_catalog()
+        ids = [
+            result['id'] for result in admin_client.post(
+                self.URL, data=get_titles(3), format='json'
+            ).json()['results']
+        ]
+        response = admin_client.patch(self.URL, data=[
+            {'id': ids[0], 'name': 'Новое название', 'category': 'book'},
+            {'id': ids[1], 'genre': ['horror']},
+            {'id': ids[2], 'year': 3000},
+            {'id': 0, 'name': 'Нет такого'},
+            {'name': 'Без id'},
+        ], format='json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS
+        assert [
+            result['status'] for result in response.json()['results']
+        ] == ['updated', 'updated', 'error', 'error', 'error']
+        title = Title.objects.get(pk=ids[0])
+        assert (title.name, title.category.slug) == ('Новое название', 'book')
+        assert title.name_normalized == 'новое название'
+        assert list(
+            Title.objects.get(pk=ids[1]).genre.values_list('slug', flat=True)
+        ) == ['horror']
+        assert Title.objects.get(pk=ids[2]).year != 3000
+
+    def test_04_deferred_version_bumps(self):
+        (version,) = get_versions(Title)
+        with defer_version_bumps():
+            bump_version(Title)
+            with defer_version_bumps():
+                bump_version(Title)
+            assert get_versions(Title) == (version,), (
+                'Проверьте, что внутри блока версия не меняется.'
+            )
+        (new_version,) = get_versions(Title)
+        assert new_version > version
@@ -305,3 +305,12 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+def count_selects(context, table):
+    """Число SELECT-запросов к таблице в CaptureQueriesContext."""
+    return sum(
+        1 for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql']
+    )